@@ -0,0 +1,89 @@
+import numpy as np   #Import numpy for fast math on whole arrays at once.
+
+from ArrayEngine import ArrayEngine, SB_CONSTANT #The adaptive engine works on the same packed cells as the array engine.
+
+class AdaptiveEngine(ArrayEngine): #An engine that picks the length of every step itself, from an estimate of the error it makes, instead of always stepping 1/stepsPerSecond.
+
+    #The physics is written as rates: how fast each cell heats up (K/s), and how fast energy is lost to space (W). Each step is a Bogacki-Shampine Runge-Kutta step,
+    #which also gives a second, less accurate answer. The difference between the two is the error estimate. Steps whose error is too large are retried shorter,
+    #and the next step is made as long as the error allows. Early on, while temperatures change fast, steps are short. Near equilibrium they get long.
+    #The fixed step engines only let an object absorb when the radiation arriving, plus the heat input, is positive. A heat source with negative watts that receives
+    #less than it draws therefore keeps the radiation waiting, and only draws its watts on the step the waiting radiation covers them. Over k steps it gains
+    #k*R + W, with k the fewest steps for which k*R > -W, the same for any step length. So rates() draws W/k of the watts, which keeps such a source warm like on the fixed step engines.
+
+    def __init__(self, simulation, tolerance=1e-6, longest=1000, shortest=1e-9): #We need a reference to the simulation object, how much error we allow per step, relative to the temperatures, and how long and short steps may get, in fixed steps of 1/stepsPerSecond.
+        self.tolerance = tolerance #Relative error allowed per step.
+        self.dt = 1 / simulation.stepsPerSecond #Length of the next step in seconds. Starts at the fixed step length.
+        self.max_dt = longest / simulation.stepsPerSecond #Longest step in seconds. When nothing changes at all, the error is 0 and steps would otherwise grow until they overflow.
+        self.min_dt = shortest / simulation.stepsPerSecond #Shortest step in seconds. A step that is still too inaccurate at this length raises instead of retrying forever.
+        self.rejected = 0 #How many steps were too inaccurate, and retried shorter.
+        super().__init__(simulation)
+
+    def pack(self): #Read the state of every slot object into arrays, like the array engine, then absorb any radiation still waiting.
+        super().pack()
+        self.temperature += self.incoming / self.capacity #Radiation waiting to be absorbed is absorbed straight away, since there are no fixed steps to wait for.
+        self.incoming[:] = 0
+        self.pending = False
+        self.first = None #The rates at the start of the next step. The last stage of a step is the first stage of the next one, so we keep it.
+
+    def rates(self, temperature, watts): #How fast each cell heats up in K/s, how much power is lost to space in W, and how much power the heat sources put in, in W.
+        emission = temperature * temperature #Power emitted out of each face of each cell, σ * T^4.
+        emission *= emission
+        emission *= SB_CONSTANT
+        received = np.bincount(self.target, weights=emission[self.source], minlength=self.space + 1) #Add up all the radiation arriving at each cell.
+        if self.negative_watts: #A heat source that receives R W draws its negative W only every k steps, see above.
+            arriving = received[:-1]
+            short = (watts < 0) & (arriving + watts <= 0)
+            k = np.floor(-watts[short] / np.maximum(arriving[short], 1e-300)) + 1 #Nothing arriving draws nothing.
+            watts = watts.copy()
+            watts[short] /= k
+        power = received[:-1] + watts - self.faces * emission
+        if self.conducting: #Conduct heat between the two sides of every TwoSidedBlackbody.
+            heat_transfer = self.conductance * (temperature[1:] - temperature[:-1]) # Q = k*A*ΔT/d
+            power[:-1] += heat_transfer
+            power[1:] -= heat_transfer
+        return power * self.inverse_capacity, received[-1], self.total(watts)
+
+    def watts_at(self, seconds): #The watts of every heat source, a number of seconds from now. The decay rate is per fixed step.
+        if not self.decaying:
+            return self.watts
+        return self.watts * self.decay**(seconds * self.simulation.stepsPerSecond)
+
+    def step(self): #Take one step, as long as the error allows, and pick the length of the next one.
+        temperature = self.temperature
+        rate1, lost1, input1 = self.first if self.first is not None else self.rates(temperature, self.watts)
+        while True: #Retry with shorter steps until the error is small enough.
+            dt = self.dt
+            rate2, lost2, input2 = self.rates(temperature + dt / 2 * rate1, self.watts_at(dt / 2))
+            rate3, lost3, input3 = self.rates(temperature + dt * 3 / 4 * rate2, self.watts_at(dt * 3 / 4))
+            new = temperature + dt * (2 / 9 * rate1 + 1 / 3 * rate2 + 4 / 9 * rate3)
+            rate4, lost4, input4 = self.rates(new, self.watts_at(dt))
+            error = dt * (-5 / 72 * rate1 + 1 / 12 * rate2 + 1 / 9 * rate3 - 1 / 8 * rate4) #Difference between the third order step we take and a second order one.
+            size = float(np.max(abs(error) / (self.tolerance * (1 + abs(new))), initial=0)) #Error relative to what we allow. Below 1 is good enough. A plain float, so the step length and the time stay plain floats too.
+            if not np.isfinite(size): #The temperatures overflowed, so no step length will help.
+                raise FloatingPointError(f"The adaptive engine's error is not finite at t={self.simulation.time} s with a step of {dt} s.")
+            if size <= 1: #Pick the length of the next step. The error grows with the cube of the step length.
+                self.dt = dt * min(5, max(0.2, 0.9 * size**(-1 / 3) if size > 0 else 5))
+                stage = temperature + dt * 3 / 4 * rate2
+                stiffness = np.max(abs(rate4 - rate3), initial=0) / max(np.max(abs(new - stage), initial=0), 1e-300) #How fast the fastest cell relaxes, in 1/s.
+                if stiffness > 0: #Steps longer than about 2.5 / stiffness are unstable. Right at that limit the error estimate lets temperatures see-saw forever, so keep clear of it.
+                    self.dt = min(self.dt, 2 / stiffness)
+                self.dt = min(self.dt, self.max_dt)
+                break
+            self.dt = dt * max(0.2, 0.9 * size**(-1 / 3)) #Too inaccurate, retry shorter.
+            self.rejected += 1
+            if self.dt < self.min_dt:
+                raise FloatingPointError(f"The adaptive engine needs steps shorter than {self.min_dt} s at t={self.simulation.time} s. Try a larger tolerance.")
+        if new.min(initial=0) < 0: #Clamp temperature to 0K, like the objects do.
+            self.simulation.JoulesClamped -= self.total(self.capacity * np.minimum(new, 0)) #Clamping adds energy back. Keep track of it in the energy ledger.
+            np.maximum(new, 0, out=new)
+            rate4, lost4, input4 = self.rates(new, self.watts_at(dt))
+        self.temperature = new
+        self.first = (rate4, lost4, input4)
+        self.simulation.JoulesLostToSpace += float(dt * (2 / 9 * lost1 + 1 / 3 * lost2 + 4 / 9 * lost3)) #Energy lost to space, integrated the same way as the temperatures. Plain floats, like the array engine.
+        if self.decaying or self.negative_watts: #Energy put in by the heat sources, integrated the same way.
+            self.simulation.JoulesInput += dt * (2 / 9 * input1 + 1 / 3 * input2 + 4 / 9 * input3)
+        else:
+            self.simulation.JoulesInput += dt * self.total(self.watts)
+        self.watts = self.watts_at(dt)
+        self.simulation.time += dt
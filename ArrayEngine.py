@@ -0,0 +1,167 @@
+import numpy as np   #Import numpy for fast math on whole arrays at once.
+
+SB_CONSTANT = 5.67e-8 # Stefan-Boltzmann constant in W/m^2K^4
+
+class ArrayEngine: #An alternate engine that packs the state of every slot into contiguous arrays, and advances the whole stack with array operations instead of calling every object.
+
+    #Every slot is split into "cells", one per temperature. Blackbodies and heat sources have one cell, TwoSided and TwoConnected blackbodies have a left and a right cell, mirrors and voids have none.
+    #Every cell emits radiation out of its faces. Where that radiation ends up (a neighbouring cell, back into itself off a mirror, or space) is worked out once, when the engine packs the slots.
+    #A step is a fixed number of numpy calls, about 20 microseconds whatever the size of the stack, while the object engine takes about 1-2 microseconds per object.
+    #So this engine is only faster from about 15 objects up, and slower on small stacks. The fused engine (see Fused.py) is the one that is faster at every size.
+    #The energy ledger is kept in plain floats, so the rest of the loop never does arithmetic on numpy numbers, which is several times slower.
+
+    def __init__(self, simulation): #We need a reference to the simulation object, so the engine can read and write its slots.
+        self.simulation = simulation #A reference to the simulation object.
+        self.pack() #Read the current state of all slots into arrays.
+
+    def pack(self): #Read the state of every slot object into arrays. Call this again if the slot objects were changed by hand.
+        slots = self.simulation.slots
+        self.cells = [] #For every slot, the indices of its cells (left, right). Empty for mirrors and voids.
+        temperature, capacity, faces, watts, decay, incoming = [], [], [], [], [], [] #One entry per cell.
+        conduct_left, conduct_kA, conduct_width = [], [], [] #One entry per conducting TwoSidedBlackbody.
+        for object in slots: #For each object in our list of objects...
+            if object.tag in ("BB", "HS"): #Blackbodies and heat sources have a single temperature, and emit out of both faces.
+                self.cells.append((len(temperature), len(temperature)))
+                temperature.append(object.temperature)
+                capacity.append(object.mass * object.specific_heat) #Heat capacity m*c, so ΔT = Q / capacity.
+                faces.append(2)
+                watts.append(object.watts if object.tag == "HS" else 0)
+                decay.append(object.decay if object.tag == "HS" else 1)
+                incoming.append(object.incoming_radiation_left + object.incoming_radiation_right)
+            elif object.tag in ("TSBB", "TCBB"): #Two sided blackbodies have a temperature per side.
+                self.cells.append((len(temperature), len(temperature) + 1))
+                temperature += [object.temperature_left, object.temperature_right]
+                capacity += [object.mass_left * object.specific_heat_left, object.mass_right * object.specific_heat_right]
+                faces += [1, 1] if object.tag == "TSBB" else [2, 2] #TwoConnected sides also radiate into each other, so they lose twice the emission.
+                watts += [0, 0]
+                decay += [1, 1]
+                incoming += [object.incoming_radiation_left, object.incoming_radiation_right]
+                if object.tag == "TSBB": #Only TwoSidedBlackbodies conduct heat between their two sides.
+                    conduct_left.append(len(temperature) - 2)
+                    conduct_kA.append(object.conductivity * object.area)
+                    conduct_width.append(object.width)
+            else: #Mirrors and voids have no temperature.
+                self.cells.append(())
+        self.temperature = self.array(temperature) #In Kelvin
+        self.capacity = self.array(capacity) #In J/K
+        self.faces = np.array(faces, dtype=float) #How many times over each cell loses its emission.
+        self.watts = self.array(watts) #In Watts. Zero for everything but heat sources.
+        self.decay = self.array(decay) #Decay rate for a fading heat source. One for everything else.
+        self.incoming = self.array(incoming) #In Joules. Radiation waiting to be absorbed.
+        self.negative_watts = bool((self.watts < 0).any()) #Decay never changes the sign, so this holds for the whole run.
+        self.inverse_capacity = 1 / self.capacity
+        self.loss = self.faces / self.capacity
+        self.pending = bool(self.incoming.any()) #Whether there is any radiation waiting to be absorbed.
+        self.decaying = bool((self.decay != 1).any())
+        self.heat = self.watts / self.simulation.stepsPerSecond #Energy put in by each heat source per step. Changes only when they decay.
+        self.input = self.total(self.heat) #Energy put in by the heat sources per step, for the energy ledger.
+        conductance = [0] * max(len(temperature) - 1, 0) #k*A/d between each cell and the next one, in W/K. Only the two sides of a TwoSidedBlackbody conduct.
+        for left, kA, width in zip(conduct_left, conduct_kA, conduct_width):
+            conductance[left] = kA / width
+        self.conductance = self.array(conductance)
+        self.conduction = self.conductance / self.simulation.stepsPerSecond #Heat conducted per step and per Kelvin, in J/K.
+        self.conducting = bool(len(conduct_left))
+        self.space = len(temperature) #The index we route radiation to when it is lost to space.
+        source, target = [], [] #Every emission: the cell it comes from, and the cell it goes to.
+        for index, object in enumerate(slots): #For each object in our list of objects...
+            if not self.cells[index]: #Mirrors and voids do not emit.
+                continue
+            left, right = self.cells[index]
+            source += [left, right]
+            target += [self.route(index, -1), self.route(index, +1)]
+            if object.tag == "TCBB": #Internal radiation between the two blackbodies.
+                source += [left, right]
+                target += [right, left]
+        self.source = np.array(source, dtype=int)
+        self.target = np.array(target, dtype=int)
+
+    def route(self, index, direction): #Find the cell that radiation emitted from slot index in direction (-1 left, +1 right) ends up in.
+        slots = self.simulation.slots
+        neighbour = index + direction
+        if neighbour < 0 or neighbour > len(slots) - 1: #If there is no object on that side...
+            return self.space #...then we lose the radiation to space.
+        if slots[neighbour].tag == "M": #If the object on that side is a mirror...
+            return self.cells[index][0 if direction < 0 else 1] #...the radiation bounces back into the side of this object that emitted it.
+        if slots[neighbour].tag == "V": #Voids absorb everything and remove it from the system.
+            return self.space
+        if neighbour < index: #Radiation going left arrives at the right side of the neighbour...
+            return self.cells[neighbour][1]
+        return self.cells[neighbour][0] #...and radiation going right arrives at its left side.
+
+    def array(self, values): #Turn a list with a value per cell into an array.
+        return np.array(values, dtype=float)
+
+    def cell(self, values, index): #The value of one cell in an array, to store on a slot object.
+        return float(values[index])
+
+    def total(self, values): #Add up a value per cell, as a plain float.
+        return float(values.sum())
+
+    def receive(self, emission): #Add up all the radiation arriving at each cell. The last entry is what is lost to space.
+        return np.bincount(self.target, weights=emission[self.source], minlength=self.space + 1)
+
+    def step(self): #Advance the whole stack by one step. Same physics, in the same order, as emit_radiation, conduct and absorb_radiation on the objects.
+        stepsPerSecond = self.simulation.stepsPerSecond
+        temperature = self.temperature
+        emission = temperature * temperature #Energy emitted out of each face of each cell this step, σ * T^4 / stepsPerSecond.
+        emission *= emission
+        emission *= SB_CONSTANT / stepsPerSecond
+        temperature -= emission * self.loss # ΔT = Q / (m*c), times the number of faces the cell loses it from.
+        np.maximum(temperature, 0, out=temperature) #Clamp temperature to 0K, like the objects do.
+        if self.decaying:
+            self.watts *= self.decay
+            self.heat = self.watts / stepsPerSecond
+            self.input = self.total(self.heat)
+        received = self.receive(emission) #Add up all the radiation arriving at each cell.
+        self.simulation.JoulesLostToSpace = self.simulation.JoulesLostToSpace + self.cell(received, -1) #The last bin is space. A plain float, so the rest of the loop never does slow arithmetic on numpy numbers. Not +=, which would change an ensemble's array in place under anyone holding the previous value.
+        if self.conducting: #Conduct heat between the two sides of every TwoSidedBlackbody. Both sides are neighbouring cells, so this works on every pair of neighbouring cells, with zero conductance where there is no TwoSidedBlackbody.
+            heat_transfer = temperature[..., 1:] - temperature[..., :-1]
+            heat_transfer *= self.conduction # Q = k*A*ΔT/d
+            temperature[..., :-1] += heat_transfer * self.inverse_capacity[..., :-1]
+            temperature[..., 1:] -= heat_transfer * self.inverse_capacity[..., 1:]
+            np.maximum(temperature, 0, out=temperature)
+        radiation = received[..., :-1] #Absorbed radiation, plus the heat input of heat sources.
+        if self.pending: #Radiation left over from before the engine took over.
+            radiation += self.incoming
+        radiation += self.heat
+        if self.negative_watts: #Objects only absorb if there is any incoming radiation, which can only fail with a negative heat source.
+            absorbed = radiation > 0
+            self.incoming = np.where(absorbed, 0, radiation - self.heat) #Unabsorbed radiation waits for the next step.
+            self.pending = not absorbed.all()
+            radiation *= absorbed
+            self.simulation.JoulesInput = self.simulation.JoulesInput + self.total(self.heat * absorbed) #Only heat sources that absorb get their input.
+        else:
+            self.simulation.JoulesInput = self.simulation.JoulesInput + self.input #Count the heat input in the energy ledger.
+            if self.pending:
+                self.incoming[:] = 0 #Reset incoming radiation after absorption.
+                self.pending = False
+        radiation *= self.inverse_capacity # ΔT = Q / (m*c)
+        temperature += radiation
+        self.simulation.time += 1 / stepsPerSecond
+
+    def energy(self): #The energy held by the cells, and the radiation waiting to be absorbed.
+        energy = self.total(self.capacity * self.temperature)
+        if self.pending:
+            energy = energy + self.total(self.incoming)
+        return energy
+
+    def run(self, steps): #Advance the whole stack by a number of steps, without touching the slot objects in between.
+        for _ in range(int(steps)):
+            self.step()
+
+    def unpack(self): #Write the state in the arrays back into the slot objects, so logging, drawing and other code can read it.
+        for object, cells in zip(self.simulation.slots, self.cells): #For each object in our list of objects...
+            if not cells: #Mirrors and voids have no state.
+                continue
+            left, right = cells
+            if object.tag in ("BB", "HS"):
+                object.temperature = self.cell(self.temperature, left)
+                object.incoming_radiation_left = self.cell(self.incoming, left)
+                object.incoming_radiation_right = 0
+                if object.tag == "HS":
+                    object.watts = self.cell(self.watts, left)
+            else:
+                object.temperature_left = self.cell(self.temperature, left)
+                object.temperature_right = self.cell(self.temperature, right)
+                object.incoming_radiation_left = self.cell(self.incoming, left)
+                object.incoming_radiation_right = self.cell(self.incoming, right)
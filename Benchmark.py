@@ -0,0 +1,133 @@
+import argparse   #For the command line interface.
+import importlib.util   #Checks whether scipy is installed, for the view factor engine.
+import json   #Results and baselines are stored as JSON.
+import os   #Temporary log files, and the SDL driver for drawing without a window.
+import platform   #Records what machine the results are from.
+import sys   #Exit code for regressions.
+import tempfile   #Log files written by the benchmarks go in a temporary directory.
+import time   #Measures the wall time of every benchmark.
+
+from Simulator import Simulation, Mirror, HeatSource, Blackbody, TwoSidedBlackbody, TwoConnectedBlackbodies, Void
+
+#Measures how many steps per second Simulation.main runs, for stacks of 1 to 1000 plates, for mixes of object types, with logging on and off,
+#and headless versus drawing. Results are written as JSON, and compared against a baseline file, so changes to the step loop, logging
+#or rendering that make them slower get caught.
+#python Benchmark.py --save Benchmark-baseline.json, then after a change: python Benchmark.py --baseline Benchmark-baseline.json
+
+MIXES = { #The objects to the right of the heat source, repeated until there are enough plates.
+    "blackbody": (Blackbody,),
+    "twosided": (TwoSidedBlackbody,),
+    "twoconnected": (TwoConnectedBlackbodies,),
+    "mirror": (Blackbody, Mirror),
+    "void": (Blackbody, Void),
+    "mixed": (Blackbody, TwoSidedBlackbody, TwoConnectedBlackbodies, Mirror, Void),
+}
+
+def case(engine="object", mix="blackbody", plates=10, log="off", mode="headless"): #One benchmark, as a dict of its settings and its name.
+    return {"name": f"{engine}/{mix}/{plates}/{log}/{mode}", "engine": engine, "mix": mix, "plates": plates, "log": log, "mode": mode}
+
+def suite(): #Every benchmark we run.
+    cases = []
+    engines = ("object", "array", "fused", "viewfactor") if importlib.util.find_spec("scipy") is not None else ("object", "array", "fused") #The view factor engine needs scipy.
+    for engine in engines: #How steps per second scale with the number of plates.
+        for plates in (1, 10, 100, 1000):
+            cases.append(case(engine, plates=plates))
+    for engine in ("object", "array"): #The cost of each type of object.
+        for mix in MIXES:
+            cases.append(case(engine, mix, plates=100))
+    for log in ("text", "binary"): #The cost of logging every step.
+        cases.append(case(log=log))
+    for mode in ("draw", "draw-every-step"): #The cost of drawing at the default frame rate, and after every step.
+        cases.append(case(mode=mode))
+    unique = {} #Drop benchmarks that appear twice.
+    for c in cases:
+        unique.setdefault(c["name"], c)
+    return list(unique.values())
+
+def build(settings, steps, directory): #Build the simulation of one benchmark, to run for a number of steps.
+    options = {"draw": settings["mode"] != "headless", "logfile": None, "maxSteps": steps, "engine": settings["engine"]}
+    if settings["log"] != "off":
+        options["logfile"] = os.path.join(directory, f"Benchmark-log.{settings['log']}")
+        options["logformat"] = settings["log"]
+    if settings["mode"] == "draw-every-step":
+        options["fps"] = None
+    simulation = Simulation(**options)
+    HeatSource(simulation)
+    mix = MIXES[settings["mix"]]
+    for plate in range(settings["plates"]):
+        mix[plate % len(mix)](simulation)
+    return simulation
+
+def measure(settings, seconds=1.0, repeats=3): #Steps per second of one benchmark. Runs for about seconds, repeats times, and keeps the fastest.
+    if settings["mode"] != "headless":
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy") #Draw without opening a window.
+    best = 0
+    with tempfile.TemporaryDirectory() as directory:
+        run(settings, 10, directory) #Warm up, e.g. so the fused engine is compiled before we time it.
+        steps = 10 #Start small, and grow until a run takes long enough to time.
+        while True:
+            elapsed = run(settings, steps, directory)
+            if elapsed >= seconds / 10 or steps >= 1e7:
+                break
+            steps *= 10
+        steps = max(1, int(steps * seconds / max(elapsed, 1e-9)))
+        for repeat in range(repeats):
+            best = max(best, steps / run(settings, steps, directory))
+    return best
+
+def run(settings, steps, directory): #Wall time of running one benchmark for a number of steps.
+    simulation = build(settings, steps, directory)
+    start = time.perf_counter()
+    simulation.main()
+    elapsed = time.perf_counter() - start
+    if simulation.draw_enabled:
+        simulation.renderer.close()
+    if simulation.logfile is not None and os.path.exists(simulation.logfile): #Every run starts with an empty log.
+        os.remove(simulation.logfile)
+    return elapsed
+
+def benchmark(cases, seconds=1.0, repeats=3, verbose=True): #Run every benchmark. Returns the results as a dict, ready to write as JSON.
+    results = {}
+    for settings in cases:
+        results[settings["name"]] = measure(settings, seconds, repeats)
+        if verbose:
+            print(f"{settings['name']:45s} {results[settings['name']]:14.1f} steps/s", flush=True)
+    return {"machine": platform.platform(), "python": platform.python_version(), "processor": platform.processor(), "results": results}
+
+def compare(results, baseline, threshold=0.2): #Compare results against a baseline. Returns the names of the benchmarks that got more than threshold slower, and prints a line per benchmark.
+    slower = []
+    for name, speed in results["results"].items():
+        if name not in baseline["results"]:
+            print(f"{name:45s} {speed:14.1f} steps/s   (not in baseline)")
+            continue
+        ratio = speed / baseline["results"][name]
+        flag = ""
+        if ratio < 1 - threshold:
+            flag = "  SLOWER"
+            slower.append(name)
+        elif ratio > 1 + threshold:
+            flag = "  faster"
+        print(f"{name:45s} {speed:14.1f} steps/s   {ratio:6.2f}x baseline{flag}")
+    return slower
+
+if __name__ == "__main__": #Command line interface.
+    parser = argparse.ArgumentParser(description="Measure steps per second of the simulation, and compare against a baseline.")
+    parser.add_argument("--output", default="Benchmark-results.json", help="File to write the results to.")
+    parser.add_argument("--baseline", default=None, help="Results of an earlier run to compare against. Exits with 1 if any benchmark got slower.")
+    parser.add_argument("--save", default=None, help="Also write the results to this file, e.g. to make them the new baseline.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="How much slower than the baseline counts as a regression, as a fraction.")
+    parser.add_argument("--seconds", type=float, default=1.0, help="About how long to run each benchmark for.")
+    parser.add_argument("--repeats", type=int, default=3, help="How often to run each benchmark. The fastest run counts.")
+    parser.add_argument("--filter", default=None, help="Only run benchmarks whose name contains this, e.g. array/ or /draw.")
+    args = parser.parse_args()
+    cases = [c for c in suite() if args.filter is None or args.filter in c["name"]]
+    results = benchmark(cases, args.seconds, args.repeats, verbose=args.baseline is None)
+    for path in (args.output, args.save):
+        if path is not None:
+            with open(path, 'w') as f:
+                json.dump(results, f, indent=1)
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
@@ -0,0 +1,116 @@
+import json   #The header describing the slot layout is stored as JSON.
+import queue   #Hands filled buffers from the simulation to the writer thread.
+import struct   #Packs the header length and the float64 records.
+import threading   #The writer thread, so disk I/O never stalls the step loop.
+
+MAGIC = b"PLATELOG" #The first 8 bytes of every binary log file.
+VERSION = 1 #Bumped whenever the layout of the file changes.
+
+def columns(tags, members=None): #Names of the columns of a record, given the tags of the slots in the simulation, and the number of members for an ensemble.
+    names = ["step"] #Every record starts with the step it was logged at.
+    if members is not None: #Ensembles write a record per member, which says which member it is.
+        names.append("member")
+    for index, tag in enumerate(tags): #For each object in the simulation...
+        if tag in ("BB", "HS"): #Blackbodies and heat sources have a single temperature.
+            names.append(f"{tag}{index}")
+        elif tag in ("TSBB", "TCBB"): #Two sided blackbodies have two temperatures.
+            names += [f"{tag}{index}_left", f"{tag}{index}_right"]
+    return names + ["lost", "energy"] #Every record ends with the Joules lost to space and the total energy in the system.
+
+def write_header(f, tags, stepsPerSecond=1000, every=1, members=None): #Write the header of a binary log to an open file. The records go straight after it.
+    header = json.dumps({"version": VERSION, "slots": list(tags), "columns": columns(tags, members), "stepsPerSecond": stepsPerSecond, "every": every, "members": members}).encode()
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % 8) #Pad the header so the records start 8 byte aligned, which lets readers memory-map them.
+    f.write(MAGIC + struct.pack("<I", len(header)) + header)
+
+class BinaryLog: #Writes simulation data as fixed-width float64 records behind a header describing the slot layout. Keeps one file handle open, buffers records, and writes them from a background thread.
+
+    def __init__(self, path, tags, stepsPerSecond=1000, every=1, buffer_size=1 << 16, members=None): #We need the file to write to and the tags of the slots. every is the number of steps between records. members is the size of an ensemble.
+        self.path = path #File to write the log to. Overwritten if it exists.
+        self.columns = columns(tags, members) #Names of the columns of every record.
+        self.record = struct.Struct(f"<{len(self.columns)}d") #One record is a float64 per column, little endian.
+        self.buffer_size = buffer_size #How many bytes we collect before handing them to the writer thread.
+        self.buffer = bytearray() #Records waiting to be handed to the writer thread.
+        self.queue = queue.Queue(maxsize=64) #Filled buffers waiting to be written. Bounded, so a slow disk slows the simulation down instead of eating all memory.
+        self.error = None #An exception raised in the writer thread, re-raised on the next write or on close.
+        self.file = open(path, 'wb') #The one file handle we keep open for the whole run.
+        write_header(self.file, tags, stepsPerSecond, every, members)
+        self.thread = threading.Thread(target=self.writer, daemon=True) #The thread that does all the writing.
+        self.thread.start()
+
+    def writer(self): #Runs in the background thread. Writes buffers to disk until it gets None.
+        while True:
+            data = self.queue.get()
+            if data is None: #None means the log is being closed.
+                return
+            try:
+                self.file.write(data)
+            except Exception as error: #Keep draining the queue so the simulation never blocks, and report the error from the main thread.
+                self.error = error
+
+    def write(self, step, temperatures, lost, energy): #Add one record to the log.
+        if self.error is not None:
+            raise self.error
+        self.buffer += self.record.pack(step, *temperatures, lost, energy)
+        if len(self.buffer) >= self.buffer_size: #Hand full buffers to the writer thread.
+            self.flush()
+
+    def write_members(self, step, temperatures, lost, energy): #Add a record for every member of an ensemble. temperatures has a row per member, lost and energy a value per member.
+        if self.error is not None:
+            raise self.error
+        import numpy as np #Ensembles always have numpy.
+        members = len(temperatures)
+        records = np.column_stack([np.full(members, step), np.arange(members), temperatures, np.broadcast_to(lost, members), np.broadcast_to(energy, members)])
+        self.buffer += records.astype("<f8").tobytes()
+        if len(self.buffer) >= self.buffer_size: #Hand full buffers to the writer thread.
+            self.flush()
+
+    def flush(self): #Hand everything buffered so far to the writer thread.
+        if self.buffer:
+            self.queue.put(bytes(self.buffer))
+            self.buffer = bytearray()
+
+    def close(self): #Write everything that is left, and close the file.
+        self.flush()
+        self.queue.put(None) #Tell the writer thread to finish.
+        self.thread.join()
+        self.file.close()
+        if self.error is not None:
+            raise self.error
+
+def read_header(f): #Read the header of an open binary log file. Returns the header, and the byte offset the records start at.
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a binary simulation log.")
+    length, = struct.unpack("<I", f.read(4))
+    header = json.loads(f.read(length))
+    return header, len(MAGIC) + 4 + length
+
+def read(path, mmap=True): #Read a binary log into a numpy array with one row per record, and one column per entry in header["columns"]. Memory-maps the file unless mmap is False.
+    import numpy as np #Only needed for reading logs back.
+    with open(path, 'rb') as f:
+        header, offset = read_header(f)
+    if mmap:
+        data = np.memmap(path, dtype="<f8", mode="r", offset=offset)
+    else:
+        data = np.fromfile(path, dtype="<f8", offset=offset)
+    return header, data.reshape(-1, len(header["columns"]))
+
+def export_text(path, textfile): #Convert a binary log to the text format Simulation.log writes, e.g. BB[...], TSBB[..., ...], M, V.
+    with open(path, 'rb') as f, open(textfile, 'w') as out:
+        header, offset = read_header(f)
+        record = struct.Struct(f"<{len(header['columns'])}d")
+        while True:
+            data = f.read(record.size)
+            if len(data) < record.size: #End of the file.
+                break
+            values = iter(record.unpack(data)[1:]) #Skip the step column, the text format does not have one.
+            line = ""
+            if header.get("members") is not None: #Ensemble records start with the member they belong to.
+                line = f"member {int(next(values))}: "
+            for tag in header["slots"]: #For each object in the simulation...
+                if tag in ("BB", "HS"): #Blackbodies and heat sources have a single temperature.
+                    line += f"{tag}[{next(values):.6f}], "
+                elif tag in ("TSBB", "TCBB"): #Two sided blackbodies have two temperatures.
+                    line += f"{tag}[{next(values):.6f}, {next(values):.6f}], "
+                else: #Mirrors and Voids do not have a temperature.
+                    line += f"{tag}, "
+            out.write(line + f"{next(values):.6f}, {next(values):.6f}\n") #The Joules lost to space and total energy in the system.
@@ -0,0 +1,172 @@
+import hashlib   #Hashes the description of a scenario into its cache key.
+import json   #Descriptions and results are stored as JSON.
+import os   #Manages the files in the cache directory.
+import tempfile   #Results are written to a temporary file first, so a killed run never leaves half a result behind.
+
+from Simulator import Simulation, Mirror, HeatSource, Blackbody, TwoSidedBlackbody, TwoConnectedBlackbodies, Void
+
+#A scenario is everything that decides the outcome of a run: the type of every object and its constructor parameters, in order, plus stepsPerSecond, maxSteps,
+#the engine and the stop conditions. describe() turns a freshly built Simulation into a canonical description, build() turns one back into a Simulation.
+#The cache stores the final state of every run it has seen under a hash of the description, so running an unchanged scenario again returns straight away.
+
+CLASSES = {cls.tag: cls for cls in (Mirror, HeatSource, Blackbody, TwoSidedBlackbody, TwoConnectedBlackbodies, Void)} #Every type of object, by tag.
+
+PARAMETERS = { #The constructor parameters of every type of object, by tag.
+    "M": (),
+    "HS": ("watts", "temperature", "specific_heat", "mass", "decay"),
+    "BB": ("temperature", "specific_heat", "mass"),
+    "TSBB": ("temperature_left", "temperature_right", "specific_heat_left", "specific_heat_right", "mass_left", "mass_right", "width", "conductivity", "area"),
+    "TCBB": ("temperature_left", "temperature_right", "specific_heat_left", "specific_heat_right", "mass_left", "mass_right", "width", "conductivity", "area"),
+    "V": (),
+}
+
+STATE = { #What changes about every type of object while the simulation runs, by tag.
+    "M": (),
+    "HS": ("temperature", "watts", "incoming_radiation_left", "incoming_radiation_right"),
+    "BB": ("temperature", "incoming_radiation_left", "incoming_radiation_right"),
+    "TSBB": ("temperature_left", "temperature_right", "incoming_radiation_left", "incoming_radiation_right"),
+    "TCBB": ("temperature_left", "temperature_right", "incoming_radiation_left", "incoming_radiation_right"),
+    "V": ("incoming_radiation_left", "incoming_radiation_right"),
+}
+
+VERSION = 2 #Bumped whenever the layout of a result changes. Results of another version are not used.
+
+OPTIONS = ("stepsPerSecond", "maxSteps", "engine", "tolerance", "stop_rate", "stop_imbalance", "batch") #The settings of a Simulation that change the outcome of a run.
+
+def number(value): #Store whole numbers as ints, so e.g. watts=400 and watts=400.0 describe the same scenario.
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+def describe(simulation): #The canonical description of a simulation that has not run yet: its settings and every object with its constructor parameters.
+    if simulation.steps: #Only the starting point of a run describes it.
+        raise ValueError("Only a simulation that has not run yet can be described.")
+    description = {name: number(getattr(simulation, name)) for name in OPTIONS}
+    description["slots"] = [[object.tag, {name: number(getattr(object, name)) for name in PARAMETERS[object.tag]}] for object in simulation.slots]
+    if simulation.exchange is not None and (simulation.exchange.properties or simulation.exchange.views): #Emissivities and view factors set by hand, for the view factor engine.
+        description["exchange"] = simulation.exchange.describe()
+    return description
+
+def build(description, **options): #Build the Simulation a description describes. Other keyword arguments go to Simulation, e.g. logfile.
+    settings = {name: description[name] for name in OPTIONS if name != "stepsPerSecond"}
+    simulation = Simulation(**{"draw": False, "logfile": None, **settings, **options})
+    simulation.stepsPerSecond = description["stepsPerSecond"]
+    for tag, parameters in description["slots"]:
+        CLASSES[tag](simulation, **parameters)
+    if "exchange" in description: #Set the emissivities and view factors again.
+        import ViewFactor
+        simulation.exchange = ViewFactor.Exchange(simulation)
+        simulation.exchange.restore(description["exchange"])
+    return simulation
+
+def key(description): #The hash of a description. Equal scenarios get equal keys, whatever order their parameters were given in.
+    text = json.dumps(description, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def result(simulation): #The final state of a simulation that has run, and a summary of it.
+    simulation.sync() #Bring the objects up to date with the array engine.
+    return {
+        "slots": [{name: getattr(object, name) for name in STATE[object.tag]} for object in simulation.slots], #The state of every object.
+        "temperatures": simulation.cell_temperatures(),
+        "JoulesLostToSpace": simulation.JoulesLostToSpace,
+        "JoulesInput": simulation.JoulesInput, #The rest of the energy ledger, so a restored run reports the same drift as the run itself.
+        "JoulesClamped": simulation.JoulesClamped,
+        "initial_energy": simulation.initial_energy,
+        "stored": [object.stored for object in simulation.slots] if simulation.engine == "object" else None, #The ledger of every object. Only the object engine keeps one.
+        "watts_to_space": simulation.watts_to_space,
+        "energy": simulation.calc_energy(),
+        "steps": simulation.steps,
+        "time": simulation.time,
+    }
+
+def restore(simulation, result): #Put a simulation in the final state of a cached result, as if it had run.
+    for object, state in zip(simulation.slots, result["slots"]):
+        for name, value in state.items():
+            setattr(object, name, value)
+    simulation.JoulesLostToSpace = result["JoulesLostToSpace"]
+    simulation.JoulesInput = result["JoulesInput"]
+    simulation.JoulesClamped = result["JoulesClamped"]
+    simulation.prevJoulesLostToSpace = result["JoulesLostToSpace"]
+    simulation.watts_to_space = result["watts_to_space"]
+    simulation.steps = result["steps"]
+    simulation.time = result["time"]
+    simulation.maxSteps -= result["steps"]
+    if simulation.array_engine is not None: #Let the array engine continue from the restored state.
+        simulation.array_engine.pack()
+    simulation.recount() #Count the restored state, then put back the ledger of the run, which may not agree with it.
+    simulation.initial_energy = result["initial_energy"]
+    if result["stored"] is not None:
+        for object, stored in zip(simulation.slots, result["stored"]):
+            object.stored = stored
+
+class ResultCache: #A directory of finished runs, one JSON file per scenario, named after the hash of its description. Evicts the least recently used runs once it gets too big.
+
+    def __init__(self, directory='Simulation-cache', max_bytes=100 * 1024**2): #We need the directory to keep results in, and how many bytes of results to keep at most.
+        self.directory = directory #Directory the results are kept in. Created if it does not exist.
+        self.max_bytes = max_bytes #Once the results take up more than this, the least recently used ones are deleted.
+        self.hits = 0 #How many lookups found a result.
+        self.misses = 0 #How many lookups did not.
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, description): #The file the result of a scenario is kept in.
+        return os.path.join(self.directory, key(description) + ".json")
+
+    def get(self, description): #The cached result of a scenario, or None if we have not run it yet.
+        path = self.path(description)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError): #Not cached, or the file is damaged.
+            self.misses += 1
+            return None
+        if entry.get("version") != VERSION or entry["description"] != description: #Stored by an older version, or two different scenarios with the same hash. The second is never going to happen, but cheap to check.
+            self.misses += 1
+            return None
+        os.utime(path) #Mark it as recently used, for eviction.
+        self.hits += 1
+        return entry["result"]
+
+    def put(self, description, result): #Store the result of a scenario, then evict old results if the cache is too big.
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(handle, 'w') as f:
+            json.dump({"version": VERSION, "description": description, "result": result}, f)
+        os.replace(temporary, self.path(description)) #Replacing is atomic, so readers see the old result or the new one, never half of one.
+        self.evict()
+
+    def evict(self): #Delete the least recently used results until the cache fits in max_bytes.
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    info = os.stat(os.path.join(self.directory, name))
+                except OSError: #Deleted by another process in the meantime.
+                    continue
+                entries.append((info.st_mtime, info.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries): #Oldest first.
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self): #Delete every result.
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                os.remove(os.path.join(self.directory, name))
+
+def run(simulation, cache=None): #Run a simulation that has not run yet, or restore its final state from the cache if this scenario ran before. Returns the result.
+    if cache is None:
+        cache = ResultCache()
+    description = describe(simulation)
+    cached = cache.get(description)
+    if cached is not None:
+        restore(simulation, cached)
+        return cached
+    simulation.main()
+    summary = result(simulation)
+    cache.put(description, summary)
+    return summary
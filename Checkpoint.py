@@ -0,0 +1,93 @@
+import json   #Checkpoints are stored as JSON. Floats are written with enough digits to read back exactly.
+import os   #Replaces the previous checkpoint in one go.
+import tempfile   #Checkpoints are written to a temporary file first, so a run killed while saving keeps its previous checkpoint.
+
+from Cache import CLASSES, PARAMETERS, STATE #The parameters and state of every type of object.
+from Simulator import Simulation
+
+#A checkpoint holds the complete state of a simulation: every object with its parameters and current state (temperatures, radiation waiting to be absorbed,
+#watts after decay), plus the Joules lost to space, the step count, the simulated time and the steps left. load() rebuilds the simulation from it,
+#and running that simulation carries on exactly where the saved one was. warm_start() only copies the temperatures of one simulation into another,
+#so a changed scenario starts from the equilibrium of the one before instead of from 0K.
+
+VERSION = 2 #Bumped whenever the layout of a checkpoint changes.
+
+def state(simulation): #The complete state of a simulation, as something json can write.
+    simulation.sync() #Bring the objects up to date with the array engine.
+    checkpoint = {
+        "version": VERSION,
+        "stepsPerSecond": simulation.stepsPerSecond,
+        "maxSteps": simulation.maxSteps, #Steps left to run.
+        "engine": simulation.engine,
+        "tolerance": simulation.tolerance,
+        "stop_rate": simulation.stop_rate,
+        "stop_imbalance": simulation.stop_imbalance,
+        "batch": simulation.batch,
+        "slots": [[object.tag, {name: getattr(object, name) for name in PARAMETERS[object.tag] + STATE[object.tag]}] for object in simulation.slots],
+        "JoulesLostToSpace": simulation.JoulesLostToSpace,
+        "JoulesInput": simulation.JoulesInput, #The energy ledger.
+        "JoulesClamped": simulation.JoulesClamped,
+        "prevJoulesLostToSpace": simulation.prevJoulesLostToSpace,
+        "watts_to_space": simulation.watts_to_space,
+        "steps": simulation.steps,
+        "time": simulation.time,
+        "previous": simulation.previous, #The state the stop conditions compare against.
+    }
+    if simulation.exchange is not None: #Emissivities and view factors set by hand, for the view factor engine.
+        checkpoint["exchange"] = simulation.exchange.describe()
+    if hasattr(simulation.array_engine, "dt"): #The adaptive engine also needs the length of its next step.
+        checkpoint["dt"] = simulation.array_engine.dt
+    return checkpoint
+
+def save(simulation, path): #Write a checkpoint of the simulation to path, replacing the previous one.
+    checkpoint = state(simulation)
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(handle, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(temporary, path) #Replacing is atomic, so there is always a complete checkpoint on disk.
+
+def load(path, **options): #Rebuild the simulation saved in a checkpoint, ready to carry on with main(). Other keyword arguments go to Simulation, e.g. logfile.
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("version") != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} checkpoint.")
+    settings = {name: checkpoint[name] for name in ("maxSteps", "engine", "tolerance", "stop_rate", "stop_imbalance", "batch")}
+    simulation = Simulation(**{"draw": False, "logfile": None, **settings, **options})
+    simulation.stepsPerSecond = checkpoint["stepsPerSecond"]
+    for tag, values in checkpoint["slots"]:
+        object = CLASSES[tag](simulation, **{name: values[name] for name in PARAMETERS[tag]})
+        for name in STATE[tag]:
+            setattr(object, name, values[name])
+    for name in ("JoulesLostToSpace", "JoulesInput", "JoulesClamped", "prevJoulesLostToSpace", "watts_to_space", "steps", "time", "previous"):
+        setattr(simulation, name, checkpoint[name])
+    if "exchange" in checkpoint: #Set the emissivities and view factors again.
+        import ViewFactor
+        simulation.exchange = ViewFactor.Exchange(simulation)
+        simulation.exchange.restore(checkpoint["exchange"])
+    if "dt" in checkpoint: #Build the adaptive engine now, so it continues with the step length it had.
+        from Adaptive import AdaptiveEngine
+        simulation.array_engine = AdaptiveEngine(simulation, simulation.tolerance)
+        simulation.array_engine.dt = checkpoint["dt"]
+    return simulation
+
+def temperatures(source): #The temperatures of every object of a simulation or checkpoint file, as a list with a dict per object.
+    if isinstance(source, str): #A checkpoint file.
+        with open(source) as f:
+            return [(tag, values) for tag, values in json.load(f)["slots"]]
+    source.sync()
+    return [(object.tag, {name: getattr(object, name) for name in STATE[object.tag] if name.startswith("temperature")}) for object in source.slots]
+
+def warm_start(simulation, source): #Start a simulation that has not run yet from the temperatures of another one, e.g. the equilibrium of the scenario before a change. source is a Simulation or a checkpoint file.
+    if simulation.steps:
+        raise ValueError("Only a simulation that has not run yet can be warm started.")
+    previous = temperatures(source)
+    if [tag for tag, _ in previous] != [object.tag for object in simulation.slots]:
+        raise ValueError("Can only warm start from a simulation with the same types of objects, in the same order.")
+    for object, (tag, values) in zip(simulation.slots, previous):
+        for name in STATE[tag]:
+            if name.startswith("temperature"):
+                setattr(object, name, values[name])
+    if simulation.array_engine is not None: #Let the array engine start from the new temperatures.
+        simulation.array_engine.pack()
+    simulation.recount() #Start the energy ledger from the new temperatures.
@@ -0,0 +1,88 @@
+import numpy as np   #Import numpy for fast math on whole arrays at once.
+
+from ArrayEngine import ArrayEngine
+from Simulator import Simulation
+
+#An ensemble is many variants of the same stack, that only differ in parameters like watts, mass, specific_heat or decay. Instead of building a Simulation per variant,
+#we build one, and give the objects a value per member wherever the variants differ, e.g. HeatSource(ensemble, watts=np.linspace(100, 400, 1000)).
+#Plain numbers are shared by all members. Every temperature becomes an array with a value per member, and one update advances all members together.
+
+class EnsembleEngine(ArrayEngine): #The array engine, with an extra first dimension for the members of the ensemble.
+
+    def __init__(self, simulation, members): #We need a reference to the simulation object, and the number of members.
+        self.members = members #Number of members in the ensemble.
+        super().__init__(simulation)
+
+    def pack(self): #Read the state of every slot object into arrays with a row per member.
+        super().pack()
+        bins = self.space + 1 #Every member gets its own set of cells, plus space, to add up the radiation arriving in.
+        self.member_target = (self.target + bins * np.arange(self.members)[:, None]).ravel()
+
+    def array(self, values): #Turn a list with a value per cell into an array with a row per member. Values can be plain numbers or have a value per member.
+        if not values:
+            return np.zeros((self.members, 0))
+        return np.stack([np.broadcast_to(np.asarray(value, dtype=float), (self.members,)) for value in values], axis=-1)
+
+    def cell(self, values, index): #The values of one cell for every member, to store on a slot object.
+        return values[:, index].copy()
+
+    def total(self, values): #Add up a value per cell, for every member.
+        return values.sum(axis=-1)
+
+    def receive(self, emission): #Add up all the radiation arriving at each cell of each member, in one go.
+        bins = self.space + 1
+        received = np.bincount(self.member_target, weights=emission[:, self.source].ravel(), minlength=self.members * bins)
+        return received.reshape(self.members, bins)
+
+class EnsembleSimulation(Simulation): #A Simulation of many members at once. Objects get a value per member for any parameter, see above.
+
+    def __init__(self, members, logfile=None, maxSteps = 1e5, logevery=1, stop_rate=None, stop_imbalance=None, drift_tolerance=None): #Ensembles are always headless, and log in binary, with a record per member.
+        super().__init__(draw=False, logfile=logfile, maxSteps=maxSteps, engine="ensemble", logformat="binary", logevery=logevery, stop_rate=stop_rate, stop_imbalance=stop_imbalance, drift_tolerance=drift_tolerance)
+        self.members = members #Number of members in the ensemble.
+        self.JoulesLostToSpace = np.zeros(members) #Energy lost to space, per member.
+        self.JoulesInput = np.zeros(members) #Energy put in by heat sources, per member.
+
+    def pack(self): #Pack the objects into arrays, if we have not yet.
+        if self.array_engine is None:
+            self.array_engine = EnsembleEngine(self, self.members)
+        return self.array_engine
+
+    def update(self): #Advance every member by one step.
+        self.pack().step()
+
+    def cell_temperatures(self): #Every temperature in the simulation, left to right, with a row per member.
+        return self.pack().temperature.copy()
+
+    def calc_energy(self): #The total energy in the system, per member.
+        return np.broadcast_to(super().calc_energy(), (self.members,))
+
+    def drifting(self): #Whether the energy drift of any member is more than drift_tolerance of the energy that went through it.
+        scale = abs(self.initial_energy) + abs(self.JoulesInput) + abs(self.JoulesLostToSpace)
+        return bool(np.any(abs(self.energy_drift(audit=False)) > self.drift_tolerance * np.maximum(scale, 1e-300)))
+
+    def log(self): #Log a record per member to the binary log file.
+        if self.logfile is None or self.steps % self.logevery: #Logging is turned off, or this is not a step we log.
+            return
+        self.sync() #calc_energy reads the objects, so bring them up to date.
+        if self.logger is None: #Open the log file on the first log.
+            import BinaryLog
+            self.logger = BinaryLog.BinaryLog(self.logfile, [object.tag for object in self.slots], self.stepsPerSecond, self.logevery, members=self.members)
+        self.logger.write_members(self.steps, self.cell_temperatures(), self.JoulesLostToSpace, self.calc_energy())
+
+    def converged(self): #Check whether every member has settled, going by stop_rate and stop_imbalance.
+        temperatures = self.cell_temperatures()
+        previous, self.previous = self.previous, (self.time, temperatures, self.JoulesLostToSpace)
+        if previous is None or self.time <= previous[0]: #We need two steps to compare.
+            return False
+        seconds = self.time - previous[0]
+        if self.stop_rate is not None and np.max(abs(temperatures - previous[1]), initial=0) / seconds > self.stop_rate: #Is any temperature of any member still changing too fast?
+            return False
+        if self.stop_imbalance is not None: #Does any member still have more or less energy going in than out?
+            watts_out = (self.JoulesLostToSpace - previous[2]) / seconds
+            if np.max(abs(self.array_engine.watts.sum(axis=-1) - watts_out)) > self.stop_imbalance:
+                return False
+        return True
+
+    def summary(self): #The state of every member: temperatures (a row per member, a column per cell), watts lost to space over the last step, Joules lost to space, and energy in the system.
+        self.sync()
+        return {"temperatures": self.cell_temperatures(), "watts_to_space": np.broadcast_to(self.watts_to_space, (self.members,)).copy(), "JoulesLostToSpace": self.JoulesLostToSpace.copy(), "energy": self.calc_energy().copy()}
@@ -0,0 +1,109 @@
+import os   #Creates the frame directory, and the SDL driver for drawing without a window.
+import queue   #Hands rendered frames to the writer threads.
+import shutil   #Finds ffmpeg for writing videos.
+import struct   #Packs the chunks of PNG files.
+import subprocess   #Runs ffmpeg, which encodes the video.
+import threading   #The writer threads, so encoding and disk I/O never stall the simulation.
+import zlib   #Compresses PNG files. It lets go of the GIL while it works, so several writer threads compress frames at once.
+
+#Renders a headless run to PNG frames or a video, without a window. The Renderer draws every object onto a surface in memory with the same drawing
+#functions as the live window, but only every Nth step, so a run of a million steps renders a few thousand frames instead of a million.
+#Frames are encoded and written from background threads. Videos are encoded by ffmpeg, which has to be installed. PNG frames are compressed with zlib
+#at its fastest level, which is several times faster than pygame.image.save, and the frames are mostly black, so they stay small anyway.
+#Export.run(simulation, "frames") writes frames/frame-000000.png and so on, Export.run(simulation, "run.mp4", frames=1800) a 60 second video at 30 fps.
+
+VIDEO = (".mp4", ".mkv", ".webm", ".avi", ".mov", ".gif") #Files with these extensions are written as videos. Anything else is a directory of PNG frames.
+
+def chunk(kind, data): #One chunk of a PNG file: its length, its kind, its data, and a checksum.
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+def png(data, size, level=1): #A PNG file of an image, given as RGB bytes a row at a time.
+    width, height = size
+    stride = width * 3
+    rows = b"".join(b"\x00" + data[y * stride:(y + 1) * stride] for y in range(height)) #Every row starts with its filter type, 0 for none.
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)) + chunk(b"IDAT", zlib.compress(rows, level)) + chunk(b"IEND", b"")
+
+class Exporter: #Renders frames of a simulation offscreen, and writes them as PNG files or a video from background threads.
+
+    def __init__(self, simulation, path, fps=30, size=(1500, 400), queue_size=16): #We need the simulation, the video file or frame directory to write to, the frame rate of the video, and the size of the frames. Videos need an even width and height.
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy") #Never open a window, even if something asks pygame for one.
+        from Renderer import Renderer #Only load pygame when we export.
+        self.simulation = simulation #A reference to the simulation object.
+        self.path = path #The video file, or the directory the PNG frames go in.
+        self.size = size #Width and height of every frame, in pixels.
+        self.renderer = Renderer(simulation, None, size, offscreen=True) #Draws onto a surface in memory, with the same drawing functions as the window.
+        self.frames = 0 #Number of frames rendered.
+        self.process = None #ffmpeg, when we write a video.
+        if os.path.splitext(path)[1].lower() in VIDEO:
+            ffmpeg = shutil.which("ffmpeg")
+            if ffmpeg is None:
+                raise RuntimeError(f"Writing {path} needs ffmpeg, which is not installed. Export to a directory of PNG frames instead.")
+            self.process = subprocess.Popen([ffmpeg, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{size[0]}x{size[1]}", "-r", str(fps), "-i", "-", "-pix_fmt", "yuv420p", path], stdin=subprocess.PIPE)
+        else:
+            os.makedirs(path, exist_ok=True)
+        self.queue = queue.Queue(maxsize=queue_size) #Rendered frames waiting to be written. Bounded, so a slow disk or encoder slows the simulation down instead of eating all memory.
+        self.error = None #An exception raised in a writer thread, re-raised on the next capture or on close.
+        writers = 1 if self.process is not None else min(4, os.cpu_count() or 1) #ffmpeg needs the frames in order, PNG files can be written in any order.
+        self.threads = [threading.Thread(target=self.writer, daemon=True) for _ in range(writers)] #The threads that do all the encoding and writing.
+        for thread in self.threads:
+            thread.start()
+
+    def writer(self): #Runs in a background thread. Writes frames until it gets None.
+        while True:
+            frame = self.queue.get()
+            if frame is None: #None means the export is being closed.
+                return
+            index, data = frame
+            try:
+                if self.process is not None:
+                    self.process.stdin.write(data)
+                else:
+                    with open(os.path.join(self.path, f"frame-{index:06d}.png"), 'wb') as f:
+                        f.write(png(data, self.size))
+            except Exception as error: #Keep draining the queue so the simulation never blocks, and report the error from the main thread.
+                self.error = error
+
+    def capture(self): #Render the current state of the simulation as the next frame.
+        if self.error is not None:
+            raise self.error
+        import pygame
+        self.simulation.sync() #Drawing reads the objects, so bring them up to date.
+        self.renderer.draw()
+        self.queue.put((self.frames, pygame.image.tobytes(self.renderer.screen, "RGB")))
+        self.frames += 1
+
+    def close(self): #Write every frame that is left, and finish the video.
+        for thread in self.threads: #Tell every writer thread to finish.
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        if self.process is not None:
+            self.process.stdin.close()
+            if self.process.wait() != 0 and self.error is None:
+                self.error = RuntimeError(f"ffmpeg could not write {self.path}.")
+        if self.error is not None:
+            raise self.error
+
+def schedule(steps, frames): #The steps to render frames frames at, spread evenly from the start to the end of a run of steps steps. A single frame is the end of the run.
+    if frames == 1:
+        return [steps]
+    return [round(frame * steps / (frames - 1)) for frame in range(frames)]
+
+def run(simulation, path, every=None, frames=None, fps=30, size=(1500, 400)): #Run a simulation headless, like main(), and render it to path every Nth step, or to exactly frames frames (10 seconds of video by default) spread over maxSteps. Returns the number of frames written.
+    exporter = Exporter(simulation, path, fps, size)
+    try:
+        if every is not None: #The starting state, every Nth step, and the final step.
+            for _ in simulation.iter_steps(every): #The fused engine stops at every frame, and runs at full speed in between.
+                exporter.capture()
+        else: #Spread the frames evenly over the run, from the starting state to the final step.
+            start = simulation.steps
+            targets = schedule(int(-(-simulation.maxSteps // 1)), frames or 10 * fps)
+            every = max(1, (targets[-1] - targets[0]) // max(len(targets) - 1, 1)) #Snapshots at least as often as frames, so every frame is taken at the first snapshot at or after its step.
+            frame = 0
+            for snapshot in simulation.iter_steps(every):
+                while frame < len(targets) and snapshot.steps - start >= targets[frame]: #A run of fewer steps than frames renders some states more than once.
+                    exporter.capture()
+                    frame += 1
+    finally:
+        exporter.close()
+    return exporter.frames
@@ -0,0 +1,128 @@
+import numpy as np   #Import numpy for the packed arrays.
+
+from ArrayEngine import ArrayEngine, SB_CONSTANT #The fused engine works on the same packed cells as the array engine.
+
+try: #numba is optional. Without it, the fused engine is the array engine.
+    import numba
+except ImportError:
+    numba = None
+
+#The array engine still goes back to Python once per step, which is most of the time a step takes for small stacks. The fused engine compiles the whole step,
+#emit, conduct and absorb for every type of object, into one function with numba, and loops over many steps inside it. Simulation.main asks it for as many
+#steps at once as it can before it has to log or save a checkpoint. Same physics, in the same order, as ArrayEngine.step. With stop_rate or stop_imbalance, the compiled loop
+#checks them after every step, the same way Simulation.converged does, and returns at the step they are met, so a run stops at the same step as on the other engines.
+
+def advance(steps, stepsPerSecond, temperature, loss, inverse_capacity, watts, decay, incoming, source, target, conductance, decaying, conducting, pending, negative_watts, lost, joules_in, time, stop_rate, stop_imbalance, armed, before): #Advance the packed cells by a number of steps, or until the stop conditions are met (negative turns one off, armed says whether the first step may stop). Returns the Joules lost to space, the Joules put in and the time after them, whether radiation is still waiting to be absorbed, the steps taken, and the time and Joules lost to space before the last step, whose temperatures are left in before.
+    n = temperature.shape[0]
+    checking = stop_rate >= 0 or stop_imbalance >= 0
+    before_time = time
+    before_lost = lost
+    h = 1 / stepsPerSecond
+    factor = SB_CONSTANT / stepsPerSecond
+    emission = np.empty(n)
+    received = np.empty(n + 1)
+    heat_transfer = np.empty(max(n - 1, 0))
+    scaled = conductance / stepsPerSecond
+    for step in range(steps):
+        if checking: #Remember the state before the step, to compare against.
+            for i in range(n):
+                before[i] = temperature[i]
+            before_time = time
+            before_lost = lost
+        for i in range(n): #Emit.
+            e = temperature[i] * temperature[i] #Energy emitted out of each face this step, σ * T^4 / stepsPerSecond.
+            e = e * e
+            e = e * factor
+            emission[i] = e
+            t = temperature[i] - e * loss[i]
+            temperature[i] = t if t > 0 else 0.0 #Clamp temperature to 0K, like the objects do.
+        if decaying:
+            for i in range(n):
+                watts[i] *= decay[i]
+        received[:] = 0.0
+        for k in range(source.shape[0]): #Add up all the radiation arriving at each cell. The last one is space.
+            received[target[k]] += emission[source[k]]
+        lost += received[n]
+        if conducting: #Conduct heat between the two sides of every TwoSidedBlackbody.
+            for i in range(n - 1):
+                heat_transfer[i] = (temperature[i + 1] - temperature[i]) * scaled[i]
+            for i in range(n - 1):
+                temperature[i] += heat_transfer[i] * inverse_capacity[i]
+            for i in range(n - 1):
+                temperature[i + 1] -= heat_transfer[i] * inverse_capacity[i + 1]
+            for i in range(n):
+                if temperature[i] < 0:
+                    temperature[i] = 0.0
+        still_pending = False
+        for i in range(n): #Absorb.
+            radiation = received[i]
+            if pending:
+                radiation += incoming[i]
+            heat = watts[i] / stepsPerSecond
+            radiation += heat
+            if negative_watts and not radiation > 0: #Objects only absorb if there is any incoming radiation. Unabsorbed radiation waits for the next step.
+                incoming[i] = radiation - heat
+                still_pending = True
+                continue
+            if pending:
+                incoming[i] = 0.0
+            joules_in += heat
+            temperature[i] += radiation * inverse_capacity[i]
+        pending = still_pending
+        time += h
+        if checking: #Has the simulation settled? The same test as Simulation.converged.
+            if armed and time > before_time:
+                seconds = time - before_time
+                settled = True
+                if stop_rate >= 0: #Is any temperature still changing too fast?
+                    rate = 0.0
+                    for i in range(n):
+                        change = abs(temperature[i] - before[i])
+                        if change > rate:
+                            rate = change
+                    if rate / seconds > stop_rate:
+                        settled = False
+                if settled and stop_imbalance >= 0: #Is there still more or less energy going in than out?
+                    watts_in = 0.0
+                    for i in range(n):
+                        watts_in += watts[i]
+                    if abs(watts_in - (lost - before_lost) / seconds) > stop_imbalance:
+                        settled = False
+                if settled:
+                    return lost, joules_in, time, pending, step + 1, before_time, before_lost
+            armed = True
+    return lost, joules_in, time, pending, steps, before_time, before_lost
+
+if numba is not None:
+    advance = numba.njit(cache=True)(advance)
+
+class FusedEngine(ArrayEngine): #The array engine, with every step compiled by numba into one function that runs many steps per call. Falls back to the array engine without numba.
+
+    compiled = numba is not None #Whether numba is installed, so steps run compiled.
+
+    def run(self, steps): #Advance the whole stack by a number of steps, without going back to Python in between. Stops early at the step the stop conditions of the simulation are met. Returns the number of steps taken.
+        steps = int(steps)
+        if not self.compiled or self.temperature.shape[0] == 0: #Step with the array engine instead.
+            for _ in range(steps):
+                ArrayEngine.step(self)
+            return steps
+        if steps <= 0:
+            return 0
+        simulation = self.simulation
+        stop_rate = -1.0 if simulation.stop_rate is None else float(simulation.stop_rate) #Negative turns a stop condition off.
+        stop_imbalance = -1.0 if simulation.stop_imbalance is None else float(simulation.stop_imbalance)
+        before = np.empty_like(self.temperature) #The temperatures before the last step.
+        simulation.JoulesLostToSpace, simulation.JoulesInput, simulation.time, self.pending, taken, before_time, before_lost = advance(
+            steps, float(simulation.stepsPerSecond), self.temperature, self.loss, self.inverse_capacity, self.watts, self.decay, self.incoming,
+            self.source, self.target, self.conductance, self.decaying, self.conducting, self.pending, self.negative_watts,
+            float(simulation.JoulesLostToSpace), float(simulation.JoulesInput), float(simulation.time),
+            stop_rate, stop_imbalance, simulation.previous is not None, before)
+        if stop_rate >= 0 or stop_imbalance >= 0: #Simulation.converged compares against the state before the last step, like after a single step.
+            simulation.previous = (before_time, before.tolist(), before_lost)
+        if self.decaying: #Keep the heat input per step of the energy ledger up to date.
+            self.heat = self.watts / simulation.stepsPerSecond
+            self.input = self.total(self.heat)
+        return taken
+
+    def step(self): #Advance the whole stack by one step.
+        self.run(1)
@@ -0,0 +1,106 @@
+import numpy as np   #Import numpy for fast math on whole arrays at once.
+
+from ArrayEngine import ArrayEngine, SB_CONSTANT #The implicit engine works on the same packed cells as the array engine.
+
+try: #numba is optional. Without it, the tridiagonal solve runs as plain Python, which is still O(n).
+    import numba
+except ImportError:
+    numba = None
+
+#The other engines work out how fast every cell heats up now, and step ahead with that. When a step is long compared to how fast a cell
+#relaxes (small masses, high conductivity), the temperatures overshoot and see-saw, and only the clamp to 0K holds them. The implicit engine
+#(backward Euler) instead asks which new temperatures are consistent with the rates at the end of the step. Emission σT^4 is linearised around
+#the current temperatures, which leaves a linear system. Radiation and conduction only connect neighbouring cells, so the system is tridiagonal,
+#and solves in O(n). Linearising around 0K badly overshoots cells that start cold, so we repeat that with Newton's method until the temperatures settle,
+#which near equilibrium takes one or two iterations. Steps of any length stay stable; stepsPerSecond only sets how accurate the path to equilibrium is.
+
+def thomas(lower, diagonal, upper, rhs): #Solve a tridiagonal system with the Thomas algorithm. lower[i] is the entry left of diagonal[i], upper[i] the one right of it. Overwrites diagonal and rhs.
+    n = diagonal.shape[0]
+    for i in range(1, n): #Eliminate the entries below the diagonal.
+        factor = lower[i] / diagonal[i - 1]
+        diagonal[i] -= factor * upper[i - 1]
+        rhs[i] -= factor * rhs[i - 1]
+    solution = np.empty(n)
+    if n == 0:
+        return solution
+    solution[n - 1] = rhs[n - 1] / diagonal[n - 1]
+    for i in range(n - 2, -1, -1): #Substitute back.
+        solution[i] = (rhs[i] - upper[i] * solution[i + 1]) / diagonal[i]
+    return solution
+
+if numba is not None:
+    thomas = numba.njit(cache=True)(thomas)
+
+class ImplicitEngine(ArrayEngine): #Advances the whole stack by backward Euler steps of 1/stepsPerSecond, solving a tridiagonal system per Newton iteration.
+
+    def __init__(self, simulation, tolerance=1e-6, iterations=50, halvings=10): #We need a reference to the simulation object, how precisely to solve every step, relative to the temperatures, at most how many Newton iterations to take for it, and how many times to halve a step that does not converge in time. iterations=1 only linearises once per step.
+        self.tolerance = tolerance #Relative change in temperature at which Newton's method stops.
+        self.iterations = iterations #Most Newton iterations per step.
+        self.halvings = halvings #Most times a step is cut in half before we give up and warn.
+        super().__init__(simulation)
+
+    def pack(self): #Read the state of every slot object into arrays, like the array engine, then absorb any radiation still waiting.
+        super().pack()
+        self.temperature += self.incoming / self.capacity #Radiation waiting to be absorbed is absorbed straight away.
+        self.incoming[:] = 0
+        self.pending = False
+        inside = self.target != self.space
+        offset = self.target - self.source #Radiation only ever goes to the cell itself, or to the cell next to it.
+        self.same = self.source[inside & (offset == 0)] #Cells whose emission comes back to themselves, e.g. off a mirror.
+        self.down = self.source[inside & (offset == 1)] #Cells whose emission goes to the next cell, which puts it below the diagonal.
+        self.up = self.source[inside & (offset == -1)] #Cells whose emission goes to the previous cell, which puts it above the diagonal.
+        self.lost = self.source[~inside] #Cells whose emission is lost to space.
+
+    def solve(self, start, dt): #Newton's method for one backward Euler step of dt seconds from the temperatures start. Returns the temperatures at the end, the energy lost to space and created by clamping on the way, and whether Newton's method converged.
+        n = self.space
+        temperature = start.copy() #The temperatures at the end of the step. Newton's method improves on them until they are consistent with the rates at the end of the step.
+        inertia = self.capacity / dt
+        for iteration in range(self.iterations):
+            emission = SB_CONSTANT * temperature**4 #Power emitted out of each face of each cell, in W.
+            slope = 4 * SB_CONSTANT * temperature**3 #How fast that grows with the temperature, in W/K.
+            power = self.receive(emission)[:-1] + self.watts - self.faces * emission #How fast each cell gains energy at these temperatures, in W.
+            diagonal = np.bincount(self.same, weights=slope[self.same], minlength=n) - self.faces * slope #Jacobian of power: diagonal[i] is d power[i] / d T[i],
+            lower = np.bincount(self.down + 1, weights=slope[self.down], minlength=n) #lower[i] is d power[i] / d T[i-1],
+            upper = np.bincount(self.up - 1, weights=slope[self.up], minlength=n) #and upper[i] is d power[i] / d T[i+1].
+            if self.conducting: #Conduct heat between the two sides of every TwoSidedBlackbody.
+                heat_transfer = self.conductance * (temperature[1:] - temperature[:-1]) # Q = k*A*ΔT/d
+                power[:-1] += heat_transfer
+                power[1:] -= heat_transfer
+                diagonal[:-1] -= self.conductance
+                diagonal[1:] -= self.conductance
+                upper[:-1] += self.conductance
+                lower[1:] += self.conductance
+            residual = power - inertia * (temperature - start) #Zero once capacity * ΔT / dt is the power at the end of the step.
+            change = thomas(-lower, inertia - diagonal, -upper, residual) #(capacity/dt - Jacobian) * change = residual, with emission linearised around these temperatures.
+            unclamped = temperature + change
+            new = np.maximum(unclamped, 0) #Clamp temperature to 0K, like the objects do.
+            settled = np.all(abs(new - temperature) <= self.tolerance * (1 + new)) #Stop once the temperatures no longer change. A cell held at 0K by the clamp counts as settled.
+            temperature = new
+            if settled:
+                break
+        lost = dt * (emission[self.lost] + slope[self.lost] * change[self.lost]).sum() #Energy lost to space, with the same linearised emission, so the energy adds up.
+        clamped = (self.capacity * (temperature - unclamped)).sum() #Energy the last clamp added, which the linearised energy balance does not know about.
+        return temperature, float(lost), float(clamped), bool(settled)
+
+    def advance(self, start, dt, halvings): #Take a backward Euler step of dt seconds from the temperatures start. When Newton's method does not converge, take two steps of half the length instead, at most halvings times over. Returns the temperatures at the end, and the energy lost to space and created by clamping.
+        temperature, lost, clamped, settled = self.solve(start, dt)
+        if settled:
+            return temperature, lost, clamped
+        if halvings <= 0: #Give up, and go on with what Newton's method got to.
+            import warnings
+            warnings.warn(f"Newton's method did not converge in {self.iterations} iterations on a step of {dt:.6g} s at step {self.simulation.steps}, even after halving it {self.halvings} times. Try more iterations or a looser tolerance.", RuntimeWarning)
+            return temperature, lost, clamped
+        middle, first_lost, first_clamped = self.advance(start, dt / 2, halvings - 1)
+        temperature, second_lost, second_clamped = self.advance(middle, dt / 2, halvings - 1)
+        return temperature, first_lost + second_lost, first_clamped + second_clamped
+
+    def step(self): #Take one backward Euler step.
+        simulation = self.simulation
+        dt = 1 / simulation.stepsPerSecond
+        if self.decaying:
+            self.watts *= self.decay
+        self.temperature, lost, clamped = self.advance(self.temperature, dt, self.halvings)
+        simulation.JoulesLostToSpace = simulation.JoulesLostToSpace + lost #Plain floats, like the array engine.
+        simulation.JoulesClamped = simulation.JoulesClamped + clamped #Energy created by clamping to 0K goes in the energy ledger, like on the objects.
+        simulation.JoulesInput = simulation.JoulesInput + self.total(self.watts) * dt
+        simulation.time += dt
@@ -0,0 +1,175 @@
+import time   #To cap the frame rate without slowing down the physics.
+
+import pygame   #Import the pygame library for drawing to the screen.
+
+BACKGROUND = (0, 0, 0) #Black background.
+
+#The drawing code of every type of object. The physics classes in Simulator.py know nothing about drawing, so a headless run never loads pygame.
+#Each function adds the rectangles and text of one object to the renderer's frame.
+
+def temperature_color(temperature): #Color shifts from blue (cold) to red (hot)
+    color_value = min(255, max(0, int(temperature*.5))) #Map temperature to a color value between 0 and 255
+    return (color_value, 0, 255 - color_value)
+
+def draw_mirror(renderer, object): #Draw the mirror as a gray rectangle.
+    color = (200, 200, 200) #Gray color for the mirror.
+    x = renderer.x(object) #x position of this object on screen.
+    renderer.rect(color, (x, 10, 10, 150)) #Draw a rectangle at (x, y) with width and height of 10 pixels.
+    renderer.text("Mirror", color, (x - 50, 200)) #Draw the name next to the mirror.
+
+def draw_heat_source(renderer, object): #Draw the heat source as a rectangle. Color depends on temperature.
+    color = temperature_color(object.temperature)
+    x = renderer.x(object) #x position of this object on screen.
+    renderer.rect(color, (x, 10, 10, 150)) #Draw a rectangle at (x, y) with width and height of 10 pixels.
+    renderer.text(f"{object.temperature:.2f} K", color, (x - 50, 220)) #Draw the temperature text next to the blackbody.
+    renderer.text(f"Heatsource {object.watts:.2f}W", color, (x - 50, 200)) #Draw the heat input next to the blackbody.
+    renderer.text(f"{object.calc_watts():.2f}W <->", color, (x - 60, 175)) #Draw the emitted power next to the blackbody.
+
+def draw_blackbody(renderer, object): #Draw the blackbody as a rectangle. Color depends on temperature.
+    color = temperature_color(object.temperature)
+    x = renderer.x(object) #x position of this object on screen.
+    renderer.rect(color, (x, 10, 10, 150)) #Draw a rectangle at (x, y) with width and height of 10 pixels.
+    renderer.text(f"{object.temperature:.2f} K", color, (x - 50, 220)) #Draw the temperature text next to the blackbody.
+    renderer.text("Blackbody", color, (x - 50, 200)) #Draw the name next to the blackbody.
+    renderer.text(f"{object.calc_watts():.2f}W <->", color, (x - 60, 175)) #Draw the emitted power next to the blackbody.
+
+def draw_two_sided(renderer, object): #Draw a two sided blackbody as two rectangles. Colors depend on the temperature of each side.
+    color_left = temperature_color(object.temperature_left)
+    color_right = temperature_color(object.temperature_right)
+    x = renderer.x(object) #x position of this object on screen.
+    renderer.rect(color_left, (x, 10, 5, 150)) #Draw the left side as a rectangle 5 pixels wide.
+    renderer.rect(color_right, (x + 5, 10, 5, 150)) #Draw the right side next to it.
+    renderer.text(f"{object.temperature_left:.2f} K left", color_left, (x - 50, 220)) #Draw the temperature text next to the blackbody.
+    renderer.text(f"{object.temperature_right:.2f} K right", color_right, (x - 50, 240)) #Draw the temperature text next to the blackbody.
+    renderer.text("TwoSided", color_left, (x - 85, 200)) #Draw the name next to the blackbody.
+    renderer.text("BBody", color_right, (x, 200))
+    renderer.text(f"{object.calc_watts('left'):.2f}W <-", color_left, (x - 90, 175)) #Draw the power emitted from each side next to the blackbody.
+    renderer.text(f"{object.calc_watts('right'):.2f}W ->", color_right, (x, 175))
+
+def draw_void(renderer, object): #Draw the void as a white outline.
+    color = (255, 255, 255) #White color for the void.
+    x = renderer.x(object) #x position of this object on screen.
+    renderer.rect(color, (x, 10, 10, 150), width=2) #Draw the outline of a rectangle at (x, y) with width and height of 10 pixels.
+    renderer.text("Void", color, (x - 50, 200)) #Draw the name next to the void.
+
+DRAW = {"M": draw_mirror, "HS": draw_heat_source, "BB": draw_blackbody, "TSBB": draw_two_sided, "TCBB": draw_two_sided, "V": draw_void} #The drawing function of every type of object, by tag.
+
+class Renderer: #Draws the simulation to the screen. Caches fonts, slot positions and rendered text, redraws only what changed, and draws at a capped frame rate, so the physics can run at full speed.
+
+    #Objects do not draw to the screen themselves. The drawing functions above add rectangles and text to the renderer's list of things on screen for this frame.
+    #When the frame is done, the renderer compares it with the previous frame, and only clears and redraws the parts of the screen where something changed.
+
+    def __init__(self, simulation, fps=60, size=(1500, 400), offscreen=False): #We need a reference to the simulation object, and how many frames per second to draw at most. fps=None draws after every step. offscreen draws onto a surface in memory instead of a window (see Export.py).
+        self.simulation = simulation #A reference to the simulation object, so the renderer can access the objects.
+        self.offscreen = offscreen #Whether we draw onto a surface in memory, without a window.
+        pygame.font.init()   #Initialize the pygame font module.
+        if offscreen:
+            self.screen = pygame.Surface(size) #A surface in memory to draw on, without any window.
+        else:
+            pygame.display.init()   #Initialize the pygame display module.
+            self.screen = pygame.display.set_mode(size) #Sets the size of the display in terms of number of pixels. Width, then height.
+            simulation.screen = self.screen #The simulation keeps a reference too, for code that draws on it directly.
+        self.fps = fps #Maximum number of frames per second.
+        self.last_frame = None #Time the last frame was drawn, from time.perf_counter().
+        self.frames = 0 #Number of frames drawn.
+        self.fonts = {} #Font objects by size. Creating a font is slow, so we only do it once per size.
+        self.texts = {} #Rendered text surfaces by (text, color, size). Rendering text is slow, and most labels do not change between frames.
+        self.positions = {} #x position of every object on screen.
+        self.layout = None #Number of objects and window width the positions were worked out for.
+        self.items = [] #Everything on screen this frame.
+        self.previous = [] #Everything on screen last frame.
+        self.full = True #Whether the whole screen needs redrawing, e.g. on the first frame.
+
+    def due(self): #Whether it is time to draw a new frame.
+        now = time.perf_counter()
+        if self.fps is None or self.last_frame is None or now - self.last_frame >= 1 / self.fps:
+            self.last_frame = now
+            return True
+        return False
+
+    def font(self, size): #A font of the given size, created once.
+        if size not in self.fonts:
+            self.fonts[size] = pygame.font.SysFont('arialblack', size) #Create a font object with the specified font and size.
+        return self.fonts[size]
+
+    def draw(self): #Draw a frame: every object, and the totals line underneath.
+        simulation = self.simulation
+        self.frame() #Start a new frame.
+        for object in simulation.slots: #For each object in our list of objects...
+            DRAW[object.tag](self, object) #Draw that object.
+        watts_in = sum([obj.watts for obj in simulation.slots if obj.tag == "HS"]) #Calculate total watts input from all heat sources.
+        energy = simulation.calc_energy()
+        self.text(f"Lost to space: {simulation.JoulesLostToSpace:.2f} J, Watts to space: {simulation.watts_to_space:.2f} W, System:  {energy:.2f} J, Watts to System: {watts_in} W,  Total: {simulation.JoulesLostToSpace + energy:.2f}", (255, 255, 255), (10, 300), size=15) #Render the totals text.
+        self.present() #Update the screen to show the parts of the drawing that changed.
+
+    def events(self): #Handle window events. Returns False once the user hits the x button.
+        for event in pygame.event.get(): #For each event pygame has as occuring...
+            if event.type == pygame.QUIT: #If that event is the type of event that comes when the user hits the x button....
+                return False
+        return True
+
+    def close(self): #Close the window.
+        pygame.quit()
+
+    def x(self, object): #The x position of an object on screen. Objects are spread evenly across the window, in the order they are in the list.
+        return self.positions[id(object)]
+
+    def frame(self): #Start a new frame. Works out the positions of the objects again if the window or the objects changed.
+        slots = self.simulation.slots
+        layout = (len(slots), self.screen.get_width())
+        if layout != self.layout: #The positions only change when the window or the objects do.
+            self.layout = layout
+            self.positions = {id(object): (index + 1) * layout[1] / (len(slots) + 1) for index, object in enumerate(slots)}
+            self.full = True
+        self.items = []
+
+    def rect(self, color, rect, width=0): #Draw a rectangle this frame. width is the thickness of the outline, 0 fills it.
+        self.items.append((("rect", color, tuple(rect), width), pygame.Rect(rect).inflate(2, 2), None)) #Each item is what it looks like, the area of the screen it covers (a pixel extra, since positions can be fractions of a pixel), and the text surface if it is text.
+
+    def text(self, text, color, position, size=12): #Draw text this frame, with its top left corner at position.
+        key = (text, color, size)
+        surface = self.texts.get(key)
+        if surface is None:
+            if len(self.texts) > 4096: #Temperatures keep changing, so don't keep every label we ever rendered.
+                self.texts.clear()
+            surface = self.texts[key] = self.font(size).render(text, True, color) #Render the text.
+        self.items.append((("text",) + key + (position,), surface.get_rect(topleft=position).inflate(2, 2), surface))
+
+    def paint(self, item): #Draw one item onto the screen.
+        key, rect, surface = item
+        if surface is None: #Rectangles, at the exact position asked for.
+            pygame.draw.rect(self.screen, key[1], key[2], width=key[3])
+        else: #Text, at the exact position asked for.
+            self.screen.blit(surface, key[4])
+
+    def present(self): #Finish the frame: redraw what changed, and show it.
+        screen = self.screen
+        dirty = [] #Parts of the screen that changed since the last frame.
+        if not self.full:
+            for index in range(max(len(self.items), len(self.previous))): #Compare this frame with the last one, item by item.
+                old = self.previous[index] if index < len(self.previous) else None
+                new = self.items[index] if index < len(self.items) else None
+                if old is not None and new is not None and old[0] == new[0]: #Unchanged.
+                    continue
+                dirty += [item[1] for item in (old, new) if item is not None] #Clear where it was, draw where it is.
+            if len(dirty) > len(self.items): #So much changed that redrawing everything is cheaper.
+                self.full = True
+        if self.full:
+            screen.fill(BACKGROUND) #Black out the screen, so we start with a fresh black canvas.
+            for item in self.items:
+                self.paint(item)
+            if not self.offscreen:
+                pygame.display.update() #Update the screen to show the new drawing.
+            self.full = False
+        elif dirty:
+            for area in dirty: #Clear every changed area, and redraw everything that overlaps it.
+                screen.set_clip(area)
+                screen.fill(BACKGROUND)
+                for item in self.items:
+                    if item[1].colliderect(area):
+                        self.paint(item)
+            screen.set_clip(None)
+            if not self.offscreen:
+                pygame.display.update(dirty) #Only send the changed areas to the screen.
+        self.previous = self.items
+        self.frames += 1
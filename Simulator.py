@@ -1,19 +1,11 @@
-import pygame   #Import the pygame library for drawing to the screen.
-
 class Mirror: #A mirror that reflects all radiation. It does not emit or absorb radiation.
     
+    tag = "M" #Short name of this type of object, used in the log file and by the array engine.
+
     def __init__(self, simulation): #We need the position of the mirror, a reference to the simulation object.
         self.simulation = simulation #A reference to the simulation object, so the mirror can access the screen and other objects.
-        self.simulation.slots.append(self) #Add this mirror to the simulation's list of objects to draw and update.
-
-    def draw(self): #Draw the mirror as a gray rectangle.
-        color = (200, 200, 200) #Gray color for the mirror.
-        font = pygame.font.SysFont('arialblack', 12) #Create a font object with the specified font and size.
-        wind = pygame.display.get_window_size()
-        pygame.draw.rect(self.simulation.screen, color, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1), 10, 10, 150)) #Draw a rectangle at (x, y) with width and height of 10 pixels.
-        img = font.render(f"Mirror", True, color) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) - 50, 200)) #Draw the temperature text next to the blackbody.
-    
+        self.simulation.add(self) #Add this mirror to the simulation's list of objects to draw and update.
+
     def emit_radiation(self): #Mirrors do not emit radiation.
         pass
 
@@ -22,29 +14,19 @@ class Mirror: #A mirror that reflects all radiation. It does not emit or absorb
 
 class HeatSource: #A heat source (blackbody) that is supplied a constant amount of heat (in Watts), has a temperature, and emits and absorbs radiation.
     
+    tag = "HS" #Short name of this type of object, used in the log file and by the array engine.
+
     def __init__(self, simulation, watts=400, temperature=0, specific_heat=1, mass=1, decay=1): #We need the position of the blackbody, a reference to the simulation object. optional physical properties.
         self.watts = watts #In Watts (Joules per second)
         self.simulation = simulation #A reference to the simulation object, so the blackbody can access the screen and other objects.
         self.temperature = temperature #In Kelvin
         self.specific_heat = specific_heat #In J/(kg*K)
         self.mass = mass #In kg
-        self.simulation.slots.append(self) #Add this blackbody to the simulation's list of objects to draw and update.
+        self.simulation.add(self) #Add this blackbody to the simulation's list of objects to draw and update.
         self.incoming_radiation_left = 0 #In Watts (Joules per second).
         self.incoming_radiation_right = 0 #In Watts (Joules per second).
         self.decay = decay #decay rate for a fading heat source
 
-    def draw(self): #Draw the heat source as a rectangle. Color depends on temperature.
-        font = pygame.font.SysFont('arialblack', 12) #Create a font object with the specified font and size.
-        color_value = min(255, max(0, int(self.temperature*.5))) #Map temperature to a color value between 0 and 255
-        color = (color_value, 0, 255 - color_value) #Color shifts from blue (cold) to red (hot)
-        pygame.draw.rect(self.simulation.screen, color, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1), 10, 10, 150)) #Draw a rectangle at (x, y) with width and height of 10 pixels.
-        img = font.render(f"{self.temperature:.2f} K", True, color) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) - 50, 220)) #Draw the temperature text next to the blackbody.
-        img = font.render(f"Heatsource {self.watts:.2f}W", True, color) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) - 50, 200)) #Draw the temperature text next to the blackbody.
-        img = font.render(f"{self.calc_watts():.2f}W <->", True, color) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) - 60, 175)) #Draw the temperature text next to the blackbody.
-
     def calc_watts(self): #Calculate the power emitted by the blackbody using the Stefan-Boltzmann law. We are simulating one milisecond, so Watts/timesteps = Joules.
         SB_CONSTANT = 5.67e-8 # Stefan-Boltzmann constant in W/m^2K^4
         return SB_CONSTANT * self.temperature**4 # Power emitted per unit area
@@ -52,24 +34,30 @@ class HeatSource: #A heat source (blackbody) that is supplied a constant amount
     def emit_radiation(self): #Mirrors do not emit radiation.
         SB_CONSTANT = 5.67e-8 # Stefan-Boltzmann constant in W/m^2K^4
         emission = SB_CONSTANT / self.simulation.stepsPerSecond * self.temperature**4 # Power emitted per unit area
-        index = self.simulation.slots.index(self) #Find the index of this object in the simulation's list of objects.
-        if index - 1 < 0: #If there is no object to the left...
+        target, right_side = self.emits_left #Where radiation emitted leftward ends up: the object it arrives at (None for space), and whether it arrives at that object's right side. Worked out once by Simulation.link.
+        if target is None: #If there is no object to the left...
             self.simulation.JoulesLostToSpace += emission #...then we lose the radiation to space.
         else:
-            if isinstance(self.simulation.slots[index - 1], Mirror): #If the object to the left is a mirror...
-                self.incoming_radiation_right += emission #Emit radiation leftward, bounces off a mirror, and is saved as rightward incoming radiation back into this object. 
-            else: 
-                self.simulation.slots[index - 1].incoming_radiation_right += emission #Send radiation to the previous (left) object in the list.
-        if  index + 1 > len(self.simulation.slots) - 1: #If there is no object to the right...
+            target.stored += emission #The energy moves into the ledger of the object it arrives at.
+            if right_side: #Send radiation to the previous (left) object in the list.
+                target.incoming_radiation_right += emission
+            else: #The object to the left is a mirror. The radiation bounces off it, back into the left side of this object.
+                target.incoming_radiation_left += emission
+        target, right_side = self.emits_right #Where radiation emitted rightward ends up.
+        if target is None: #If there is no object to the right...
             self.simulation.JoulesLostToSpace += emission #...then we lose the radiation to space.
         else:
-            if isinstance(self.simulation.slots[index + 1], Mirror): #If the object to the right is a mirror...
-                self.incoming_radiation_left += emission #Emit radiation rightward, bounces off a mirror, and is saved as leftward incoming radiation back into this object. 
-            else:
-                self.simulation.slots[index + 1].incoming_radiation_left += emission #Send radiation to the next (right) object in the list.
+            target.stored += emission #The energy moves into the ledger of the object it arrives at.
+            if right_side: #The object to the right is a mirror. The radiation bounces off it, back into the right side of this object.
+                target.incoming_radiation_right += emission
+            else: #Send radiation to the next (right) object in the list.
+                target.incoming_radiation_left += emission
+        self.stored -= emission*2 #The energy leaves the ledger of this object.
         delta_temp = emission*2 / (self.mass * self.specific_heat) # ΔT = Q / (m*c), with 2x because we emit in two directions.
         self.temperature -= delta_temp #Lose temperature due to radiation emission.s
         if self.temperature < 0: #Clamp temperature to 0K. Shold never happen, but needed for simulation stability.
+            self.simulation.JoulesClamped -= self.mass * self.specific_heat * self.temperature #Clamping adds energy back. Keep track of it in the energy ledger.
+            self.stored -= self.mass * self.specific_heat * self.temperature #And to the ledger of this object.
             self.temperature = 0
         self.watts *= self.decay
         
@@ -78,6 +66,8 @@ class HeatSource: #A heat source (blackbody) that is supplied a constant amount
     def absorb_radiation(self): #Absorb incoming radiation and update temperature.
         radiation = self.incoming_radiation_left + self.incoming_radiation_right + self.watts/self.simulation.stepsPerSecond #Add the constant heat input in Joules (Watts/1000 for miliseconds)
         if radiation > 0: #If there is any incoming radiation...
+            self.simulation.JoulesInput += self.watts/self.simulation.stepsPerSecond #Count the heat input in the energy ledger.
+            self.stored += self.watts/self.simulation.stepsPerSecond #And to the ledger of this object.
             delta_temp = radiation / (self.mass * self.specific_heat) # ΔT = Q / (m*c)
             self.temperature += delta_temp #Increase temperature due to absorbed radiation.
             self.incoming_radiation_left = 0 #Reset incoming radiation after absorption.
@@ -85,27 +75,17 @@ class HeatSource: #A heat source (blackbody) that is supplied a constant amount
 
 class Blackbody: #A blackbody that emits and absorbs radiation.
     
+    tag = "BB" #Short name of this type of object, used in the log file and by the array engine.
+
     def __init__(self, simulation, temperature=0, specific_heat=1, mass=1): #We need the position of the blackbody, a reference to the simulation object. optional physical properties.
         self.simulation = simulation #A reference to the simulation object, so the blackbody can access the screen and other objects.
         self.temperature = temperature #In Kelvin
         self.specific_heat = specific_heat #In J/(kg*K)
         self.mass = mass #In kg
-        self.simulation.slots.append(self) #Add this blackbody to the simulation's list of objects to draw and update.
+        self.simulation.add(self) #Add this blackbody to the simulation's list of objects to draw and update.
         self.incoming_radiation_left = 0 #In Watts (Joules per second).
         self.incoming_radiation_right = 0 #In Watts (Joules per second).
 
-    def draw(self): #Draw the blackbody as a rectangle. Color depends on temperature.
-        font = pygame.font.SysFont('arialblack', 12) #Create a font object with the specified font and size.
-        color_value = min(255, max(0, int(self.temperature*.5))) #Map temperature to a color value between 0 and 255
-        color = (color_value, 0, 255 - color_value) #Color shifts from blue (cold) to red (hot)
-        pygame.draw.rect(self.simulation.screen, color, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1), 10, 10, 150)) #Draw a rectangle at (x, y) with width and height of 10 pixels.
-        img = font.render(f"{self.temperature:.2f} K", True, color) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) - 50, 220)) #Draw the temperature text next to the blackbody.
-        img = font.render(f"Blackbody", True, color) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) - 50, 200)) #Draw the temperature text next to the blackbody.
-        img = font.render(f"{self.calc_watts():.2f}W <->", True, color) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) - 60, 175)) #Draw the temperature text next to the blackbody.
-
     def calc_watts(self): #Calculate the power emitted by the blackbody using the Stefan-Boltzmann law. We are simulating one milisecond, so Watts/1000 = Joules.
         SB_CONSTANT = 5.67e-8 # Stefan-Boltzmann constant in W/m^2K^4
         return SB_CONSTANT * self.temperature**4 # Power emitted per unit area
@@ -113,24 +93,30 @@ class Blackbody: #A blackbody that emits and absorbs radiation.
     def emit_radiation(self): #Calculate the power emitted by the blackbody using the Stefan-Boltzmann law. We are simulating one milisecond, so Watts/1000 = Joules.
         SB_CONSTANT = 5.67e-8 # Stefan-Boltzmann constant in W/m^2K^4
         emission = SB_CONSTANT / self.simulation.stepsPerSecond * self.temperature**4 # Power emitted per unit area
-        index = self.simulation.slots.index(self) #Find the index of this object in the simulation's list of objects.
-        if index - 1 < 0: #If there is no object to the left...
+        target, right_side = self.emits_left #Where radiation emitted leftward ends up: the object it arrives at (None for space), and whether it arrives at that object's right side. Worked out once by Simulation.link.
+        if target is None: #If there is no object to the left...
             self.simulation.JoulesLostToSpace += emission #...then we lose the radiation to space.
         else:
-            if isinstance(self.simulation.slots[index - 1], Mirror): #If the object to the left is a mirror...s
-                self.incoming_radiation_left += emission #Emit radiation leftward, bounces off a mirror, and is saved as rightward incoming radiation back into this object. 
-            else:
-                self.simulation.slots[index - 1].incoming_radiation_right += emission #Send radiation to the previous (left) object in the list.
-        if  index + 1 > len(self.simulation.slots) - 1: #If there is no object to the right...
+            target.stored += emission #The energy moves into the ledger of the object it arrives at.
+            if right_side: #Send radiation to the previous (left) object in the list.
+                target.incoming_radiation_right += emission
+            else: #The object to the left is a mirror. The radiation bounces off it, back into the left side of this object.
+                target.incoming_radiation_left += emission
+        target, right_side = self.emits_right #Where radiation emitted rightward ends up.
+        if target is None: #If there is no object to the right...
             self.simulation.JoulesLostToSpace += emission #...then we lose the radiation to space.
         else:
-            if isinstance(self.simulation.slots[index + 1], Mirror): #If the object to the right is a mirror...
-                self.incoming_radiation_right += emission #Emit radiation rightward, bounces off a mirror, and is saved as leftward incoming radiation back into this object. 
-            else:
-                self.simulation.slots[index + 1].incoming_radiation_left += emission #Send radiation to the next (right) object in the list.
+            target.stored += emission #The energy moves into the ledger of the object it arrives at.
+            if right_side: #The object to the right is a mirror. The radiation bounces off it, back into the right side of this object.
+                target.incoming_radiation_right += emission
+            else: #Send radiation to the next (right) object in the list.
+                target.incoming_radiation_left += emission
+        self.stored -= emission*2 #The energy leaves the ledger of this object.
         delta_temp = emission*2 / (self.mass * self.specific_heat) # ΔT = Q / (m*c), with 2x because we emit in two directions.
         self.temperature -= delta_temp #Lose temperature due to radiation emission.
         if self.temperature < 0: #Clamp temperature to 0K. Shold never happen, but needed for simulation stability.
+            self.simulation.JoulesClamped -= self.mass * self.specific_heat * self.temperature #Clamping adds energy back. Keep track of it in the energy ledger.
+            self.stored -= self.mass * self.specific_heat * self.temperature #And to the ledger of this object.
             self.temperature = 0
         
     def absorb_radiation(self): #Absorb incoming radiation and update temperature.
@@ -143,6 +129,8 @@ class Blackbody: #A blackbody that emits and absorbs radiation.
 
 class TwoSidedBlackbody: #A blackbody that emits and absorbs radiation separately on its left and right sides, and conducts heat between its two sides.
     
+    tag = "TSBB" #Short name of this type of object, used in the log file and by the array engine.
+
     def __init__(self, simulation, temperature_left=0, temperature_right=0, specific_heat_left=1, specific_heat_right = 1, mass_left=0.5, mass_right=0.5, width=1, conductivity=5, area=1): #We need the position of the blackbody, a reference to the simulation object. optional physical properties.
         self.simulation = simulation #A reference to the simulation object, so the blackbody can access the screen and other objects.
         self.temperature_left = temperature_left #In Kelvin
@@ -154,31 +142,10 @@ class TwoSidedBlackbody: #A blackbody that emits and absorbs radiation separatel
         self.mass_left = mass_left #In kg
         self.width = width #In meters. (defined from the center of the left side to the center of the right side)
         self.conductivity = conductivity #In W/(m*K). How well heat conducts through the material.
-        self.simulation.slots.append(self) #Add this blackbody to the simulation's list of objects to draw and update.
+        self.simulation.add(self) #Add this blackbody to the simulation's list of objects to draw and update.
         self.incoming_radiation_left = 0 #In Watts (Joules per second).
         self.incoming_radiation_right = 0 #In Watts (Joules per second).
 
-    def draw(self): #Draw the blackbody as a rectangle. Color depends on temperature.
-        font = pygame.font.SysFont('arialblack', 12) #Create a font object with the specified font and size.
-        color_value_left = min(255, max(0, int(self.temperature_left*.5))) #Map temperature to a color value between 0 and 255
-        color_value_right = min(255, max(0, int(self.temperature_right*.5))) #Map temperature to a color value between 0 and 255
-        color_left = (color_value_left, 0, 255 - color_value_left) #Color shifts from blue (cold) to red (hot)
-        color_right = (color_value_right, 0, 255 - color_value_right) #Color shifts from blue (cold) to red (hot)
-        pygame.draw.rect(self.simulation.screen, color_left, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1), 10, 5, 150)) #Draw a rectangle at (x, y) with width and height of 10 pixels.
-        pygame.draw.rect(self.simulation.screen, color_right, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) + 5, 10, 5, 150)) #Draw a rectangle at (x, y) with width and height of 10 pixels.
-        img = font.render(f"{self.temperature_left:.2f} K left", True, color_left) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) - 50, 220)) #Draw the temperature text next to the blackbody.
-        img = font.render(f"{self.temperature_right:.2f} K right", True, color_right) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) - 50, 240)) #Draw the temperature text next to the blackbody.
-        img = font.render(f"TwoSided", True, color_left) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) - 85, 200)) #Draw the temperature text next to the blackbody.
-        img = font.render(f"BBody", True, color_right) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) , 200)) #Draw the temperature text next to the blackbody.
-        img = font.render(f"{self.calc_watts("left"):.2f}W <-", True, color_left) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) - 90, 175)) #Draw the temperature text next to the blackbody.
-        img = font.render(f"{self.calc_watts("right"):.2f}W ->", True, color_right) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1), 175)) #Draw the temperature text next to the blackbody.
-
     def calc_watts(self, side): #Calculate the power emitted by the blackbody using the Stefan-Boltzmann law. We are simulating one milisecond, so Watts/1000 = Joules.
         if side == "left":
             temperature = self.temperature_left
@@ -191,28 +158,36 @@ class TwoSidedBlackbody: #A blackbody that emits and absorbs radiation separatel
         SB_CONSTANT = 5.67e-8 # Stefan-Boltzmann constant in W/m^2K^4
         emission_left = SB_CONSTANT / self.simulation.stepsPerSecond * self.temperature_left**4 # Power emitted per unit area
         emission_right = SB_CONSTANT / self.simulation.stepsPerSecond * self.temperature_right**4 # Power emitted per unit area
-        index = self.simulation.slots.index(self) #Find the index of this object in the simulation's list of objects.
-        if index - 1 < 0: #If there is no object to the left...
+        target, right_side = self.emits_left #Where radiation emitted leftward ends up: the object it arrives at (None for space), and whether it arrives at that object's right side. Worked out once by Simulation.link.
+        if target is None: #If there is no object to the left...
             self.simulation.JoulesLostToSpace += emission_left #...then we lose the radiation to space.
         else:
-            if isinstance(self.simulation.slots[index - 1], Mirror): #If the object to the left is a mirror...s
-                self.incoming_radiation_left += emission_left #Emit radiation leftward, bounces off a mirror, and is saved as rightward incoming radiation back into this object. 
-            else:
-                self.simulation.slots[index - 1].incoming_radiation_right += emission_left #Send radiation to the previous (left) object in the list.
-        if  index + 1 > len(self.simulation.slots) - 1: #If there is no object to the right...
+            target.stored += emission_left #The energy moves into the ledger of the object it arrives at.
+            if right_side: #Send radiation to the previous (left) object in the list.
+                target.incoming_radiation_right += emission_left
+            else: #The object to the left is a mirror. The radiation bounces off it, back into the left side of this object.
+                target.incoming_radiation_left += emission_left
+        target, right_side = self.emits_right #Where radiation emitted rightward ends up.
+        if target is None: #If there is no object to the right...
             self.simulation.JoulesLostToSpace += emission_right #...then we lose the radiation to space.
         else:
-            if isinstance(self.simulation.slots[index + 1], Mirror): #If the object to the right is a mirror...
-                self.incoming_radiation_right += emission_right #Emit radiation rightward, bounces off a mirror, and is saved as leftward incoming radiation back into this object. 
-            else:
-                self.simulation.slots[index + 1].incoming_radiation_left += emission_right #Send radiation to the next (right) object in the list.
+            target.stored += emission_right #The energy moves into the ledger of the object it arrives at.
+            if right_side: #The object to the right is a mirror. The radiation bounces off it, back into the right side of this object.
+                target.incoming_radiation_right += emission_right
+            else: #Send radiation to the next (right) object in the list.
+                target.incoming_radiation_left += emission_right
+        self.stored -= emission_left + emission_right #The energy leaves the ledger of this object.
         delta_temp_left = emission_left / (self.mass_left * self.specific_heat_left) # ΔT = Q / (m*c), with 2x because we emit in two directions.
         self.temperature_left -= delta_temp_left #Lose temperature due to radiation emission.
         if self.temperature_left < 0: #Clamp temperature to 0K. Shold never happen, but needed for simulation stability.
+            self.simulation.JoulesClamped -= self.mass_left * self.specific_heat_left * self.temperature_left #Clamping adds energy back. Keep track of it in the energy ledger.
+            self.stored -= self.mass_left * self.specific_heat_left * self.temperature_left #And to the ledger of this object.
             self.temperature_left = 0
         delta_temp_right = emission_right / (self.mass_right * self.specific_heat_right) # ΔT = Q / (m*c), with 2x because we emit in two directions.
         self.temperature_right -= delta_temp_right #Lose temperature due to radiation emission.     
         if self.temperature_right < 0: #Clamp temperature to 0K. Shold never happen, but needed for simulation stability.
+            self.simulation.JoulesClamped -= self.mass_right * self.specific_heat_right * self.temperature_right #Clamping adds energy back. Keep track of it in the energy ledger.
+            self.stored -= self.mass_right * self.specific_heat_right * self.temperature_right #And to the ledger of this object.
             self.temperature_right = 0  
         
     def absorb_radiation(self): #Absorb incoming radiation and update temperature.
@@ -234,12 +209,18 @@ class TwoSidedBlackbody: #A blackbody that emits and absorbs radiation separatel
             self.temperature_left += delta_temp_left #Increase temperature on the left side.
             self.temperature_right -= delta_temp_right #Decrease temperature on the right side.
             if self.temperature_left < 0: #Clamp temperature to 0K. Should never happen, but needed for simulation stability.
+                self.simulation.JoulesClamped -= self.mass_left * self.specific_heat_left * self.temperature_left #Clamping adds energy back. Keep track of it in the energy ledger.
+                self.stored -= self.mass_left * self.specific_heat_left * self.temperature_left #And to the ledger of this object.
                 self.temperature_left = 0
             if self.temperature_right < 0: #Clamp temperature to 0K. Should never happen, but needed for simulation stability.
+                self.simulation.JoulesClamped -= self.mass_right * self.specific_heat_right * self.temperature_right #Clamping adds energy back. Keep track of it in the energy ledger.
+                self.stored -= self.mass_right * self.specific_heat_right * self.temperature_right #And to the ledger of this object.
                 self.temperature_right = 0
 
 class TwoConnectedBlackbodies: #Two blackbodies that are thermally connected, and also exchange radiation.
     
+    tag = "TCBB" #Short name of this type of object, used in the log file and by the array engine.
+
     def __init__(self, simulation, temperature_left=0, temperature_right=0, specific_heat_left=1, specific_heat_right = 1, mass_left=0.5, mass_right=0.5, width=1, conductivity=5, area=1): #We need the position of the blackbody, a reference to the simulation object. optional physical properties.
         self.simulation = simulation #A reference to the simulation object, so the blackbody can access the screen and other objects.
         self.temperature_left = temperature_left #In Kelvin
@@ -251,31 +232,10 @@ class TwoConnectedBlackbodies: #Two blackbodies that are thermally connected, an
         self.mass_left = mass_left #In kg
         self.width = width #In meters. (defined from the center of the left side to the center of the right side)
         self.conductivity = conductivity #In W/(m*K). How well heat conducts through the material.
-        self.simulation.slots.append(self) #Add this blackbody to the simulation's list of objects to draw and update.
+        self.simulation.add(self) #Add this blackbody to the simulation's list of objects to draw and update.
         self.incoming_radiation_left = 0 #In Watts (Joules per second).
         self.incoming_radiation_right = 0 #In Watts (Joules per second).
 
-    def draw(self): #Draw the blackbody as a rectangle. Color depends on temperature.
-        font = pygame.font.SysFont('arialblack', 12) #Create a font object with the specified font and size.
-        color_value_left = min(255, max(0, int(self.temperature_left*.5))) #Map temperature to a color value between 0 and 255
-        color_value_right = min(255, max(0, int(self.temperature_right*.5))) #Map temperature to a color value between 0 and 255
-        color_left = (color_value_left, 0, 255 - color_value_left) #Color shifts from blue (cold) to red (hot)
-        color_right = (color_value_right, 0, 255 - color_value_right) #Color shifts from blue (cold) to red (hot)
-        pygame.draw.rect(self.simulation.screen, color_left, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1), 10, 5, 150)) #Draw a rectangle at (x, y) with width and height of 10 pixels.
-        pygame.draw.rect(self.simulation.screen, color_right, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) + 5, 10, 5, 150)) #Draw a rectangle at (x, y) with width and height of 10 pixels.
-        img = font.render(f"{self.temperature_left:.2f} K left", True, color_left) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) - 50, 220)) #Draw the temperature text next to the blackbody.
-        img = font.render(f"{self.temperature_right:.2f} K right", True, color_right) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) - 50, 240)) #Draw the temperature text next to the blackbody.
-        img = font.render(f"TwoSided", True, color_left) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) - 85, 200)) #Draw the temperature text next to the blackbody.
-        img = font.render(f"BBody", True, color_right) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) , 200)) #Draw the temperature text next to the blackbody.
-        img = font.render(f"{self.calc_watts("left"):.2f}W <-", True, color_left) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) - 90, 175)) #Draw the temperature text next to the blackbody.
-        img = font.render(f"{self.calc_watts("right"):.2f}W ->", True, color_right) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1), 175)) #Draw the temperature text next to the blackbody.
-
     def calc_watts(self, side): #Calculate the power emitted by the blackbody using the Stefan-Boltzmann law. We are simulating one milisecond, so Watts/1000 = Joules.
         if side == "left":
             temperature = self.temperature_left
@@ -290,28 +250,36 @@ class TwoConnectedBlackbodies: #Two blackbodies that are thermally connected, an
         emission_right = SB_CONSTANT / self.simulation.stepsPerSecond * self.temperature_right**4 # Power emitted per unit area
         self.incoming_radiation_left += emission_right #Internal radiation between the two blackbodies.
         self.incoming_radiation_right += emission_left #Internal radiation between the two blackbodies.
-        index = self.simulation.slots.index(self) #Find the index of this object in the simulation's list of objects.
-        if index - 1 < 0: #If there is no object to the left...
+        target, right_side = self.emits_left #Where radiation emitted leftward ends up: the object it arrives at (None for space), and whether it arrives at that object's right side. Worked out once by Simulation.link.
+        if target is None: #If there is no object to the left...
             self.simulation.JoulesLostToSpace += emission_left #...then we lose the radiation to space.
         else:
-            if isinstance(self.simulation.slots[index - 1], Mirror): #If the object to the left is a mirror...s
-                self.incoming_radiation_left += emission_left #Emit radiation leftward, bounces off a mirror, and is saved as rightward incoming radiation back into this object. 
-            else:
-                self.simulation.slots[index - 1].incoming_radiation_right += emission_left #Send radiation to the previous (left) object in the list.
-        if  index + 1 > len(self.simulation.slots) - 1: #If there is no object to the right...
+            target.stored += emission_left #The energy moves into the ledger of the object it arrives at.
+            if right_side: #Send radiation to the previous (left) object in the list.
+                target.incoming_radiation_right += emission_left
+            else: #The object to the left is a mirror. The radiation bounces off it, back into the left side of this object.
+                target.incoming_radiation_left += emission_left
+        target, right_side = self.emits_right #Where radiation emitted rightward ends up.
+        if target is None: #If there is no object to the right...
             self.simulation.JoulesLostToSpace += emission_right #...then we lose the radiation to space.
         else:
-            if isinstance(self.simulation.slots[index + 1], Mirror): #If the object to the right is a mirror...
-                self.incoming_radiation_right += emission_right #Emit radiation rightward, bounces off a mirror, and is saved as leftward incoming radiation back into this object. 
-            else:
-                self.simulation.slots[index + 1].incoming_radiation_left += emission_right #Send radiation to the next (right) object in the list.
+            target.stored += emission_right #The energy moves into the ledger of the object it arrives at.
+            if right_side: #The object to the right is a mirror. The radiation bounces off it, back into the right side of this object.
+                target.incoming_radiation_right += emission_right
+            else: #Send radiation to the next (right) object in the list.
+                target.incoming_radiation_left += emission_right
+        self.stored -= emission_left + emission_right #The energy leaves the ledger of this object. What the two blackbodies radiate into each other stays in it.
         delta_temp_left = emission_left*2 / (self.mass_left * self.specific_heat_left) # ΔT = Q / (m*c), with 2x because we emit in two directions.
         self.temperature_left -= delta_temp_left #Lose temperature due to radiation emission.
         if self.temperature_left < 0: #Clamp temperature to 0K. Shold never happen, but needed for simulation stability.
+            self.simulation.JoulesClamped -= self.mass_left * self.specific_heat_left * self.temperature_left #Clamping adds energy back. Keep track of it in the energy ledger.
+            self.stored -= self.mass_left * self.specific_heat_left * self.temperature_left #And to the ledger of this object.
             self.temperature_left = 0
         delta_temp_right = emission_right*2 / (self.mass_right * self.specific_heat_right) # ΔT = Q / (m*c), with 2x because we emit in two directions.
         self.temperature_right -= delta_temp_right #Lose temperature due to radiation emission.     
         if self.temperature_right < 0: #Clamp temperature to 0K. Shold never happen, but needed for simulation stability.
+            self.simulation.JoulesClamped -= self.mass_right * self.specific_heat_right * self.temperature_right #Clamping adds energy back. Keep track of it in the energy ledger.
+            self.stored -= self.mass_right * self.specific_heat_right * self.temperature_right #And to the ledger of this object.
             self.temperature_right = 0  
         
     def absorb_radiation(self): #Absorb incoming radiation and update temperature.
@@ -333,76 +301,244 @@ class TwoConnectedBlackbodies: #Two blackbodies that are thermally connected, an
             self.temperature_left += delta_temp_left #Increase temperature on the left side.
             self.temperature_right -= delta_temp_right #Decrease temperature on the right side.
             if self.temperature_left < 0: #Clamp temperature to 0K. Should never happen, but needed for simulation stability.
+                self.simulation.JoulesClamped -= self.mass_left * self.specific_heat_left * self.temperature_left #Clamping adds energy back. Keep track of it in the energy ledger.
+                self.stored -= self.mass_left * self.specific_heat_left * self.temperature_left #And to the ledger of this object.
                 self.temperature_left = 0
             if self.temperature_right < 0: #Clamp temperature to 0K. Should never happen, but needed for simulation stability.
+                self.simulation.JoulesClamped -= self.mass_right * self.specific_heat_right * self.temperature_right #Clamping adds energy back. Keep track of it in the energy ledger.
+                self.stored -= self.mass_right * self.specific_heat_right * self.temperature_right #And to the ledger of this object.
                 self.temperature_right = 0
 
 class Void: #A void that does not emit or have a temperature, but can absorb radiation and remove it from the system.:
     
+    tag = "V" #Short name of this type of object, used in the log file and by the array engine.
+
     def __init__(self, simulation): #We need the position of the void, a reference to the simulation object.
         self.simulation = simulation #A reference to the simulation object, so the void can access the screen and other objects.
-        self.simulation.slots.append(self) #Add this void to the simulation's list of objects to draw and update.
+        self.simulation.add(self) #Add this void to the simulation's list of objects to draw and update.
         self.incoming_radiation_left = 0 #In Watts (Joules per second).
         self.incoming_radiation_right = 0 #In Watts (Joules per second).
 
-    def draw(self): #Draw the mirror as a gray rectangle.
-        color = (255, 255, 255) #Gray color for the mirror.
-        font = pygame.font.SysFont('arialblack', 12) #Create a font object with the specified font and size.
-        wind = pygame.display.get_window_size()
-        pygame.draw.rect(self.simulation.screen, color, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1), 10, 10, 150), width=2) #Draw a rectangle at (x, y) with width and height of 10 pixels.
-        img = font.render(f"Void", True, color) #Render the temperature text.
-        self.simulation.screen.blit(img, ((self.simulation.slots.index(self) + 1)*pygame.display.get_window_size()[0]/(len(self.simulation.slots) + 1) - 50, 200)) #Draw the temperature text next to the blackbody.
-    
     def emit_radiation(self): #Mirrors do not emit radiation.
         pass
 
     def absorb_radiation(self): #Mirrors do not absorb radiation.
         absorbed = self.incoming_radiation_left + self.incoming_radiation_right
         self.simulation.JoulesLostToSpace += absorbed #All absorbed radiation is lost to space.
+        self.stored -= absorbed #It leaves the ledger of this void.
         self.incoming_radiation_left = 0 #Reset incoming radiation after absorption.
         self.incoming_radiation_right = 0 #Reset incoming radiation after absorption.=
 
+class Slots(list): #The list of objects of a simulation. Counts every change to it in version, so the simulation knows when to work out neighbours and count energy again, also after changes by hand, without comparing the objects every step.
+    version = 0 #Bumped by every change to the list.
+
+for name in ("__setitem__", "__delitem__", "__iadd__", "__imul__", "append", "extend", "insert", "pop", "remove", "clear", "sort", "reverse"): #Every method that changes a list bumps the version.
+    def changed(self, *args, _change=getattr(list, name), **kwargs):
+        self.version += 1
+        return _change(self, *args, **kwargs)
+    setattr(Slots, name, changed)
+
 class Simulation: #This is the main class. It contains all the code for running the simulation.
 
-    def __init__(self, draw=True, logfile='Simulation-log.dat', maxSteps = 1e5): #Constructor for the Simulation object. This code gets run whenever we make a new Simulation object, like: Simulation(). 
+    def __init__(self, draw=True, logfile='Simulation-log.dat', maxSteps = 1e5, engine="object", logformat="text", logevery=1, tolerance=1e-6, stop_rate=None, stop_imbalance=None, fps=60, checkpoint=None, checkpointevery=10000, stats=False, statsfile=None, statsevery=None, profile=None, drift_tolerance=None, batch=1000, auditevery=1000): #Constructor for the Simulation object. This code gets run whenever we make a new Simulation object, like: Simulation(). 
             self.draw_enabled = draw #Whether to draw the simulation to the screen.
             self.maxSteps = maxSteps #Maximum number of steps to run the simulation for.
-            self.logfile = logfile #File to log simulation data.
+            self.logfile = logfile #File to log simulation data. None turns logging off.
+            self.logformat = logformat #"text" appends a line of text per step, "binary" writes float64 records from a background thread (see BinaryLog.py).
+            self.logevery = logevery #Only log every Nth step.
+            self.logger = None #The BinaryLog, opened on the first log.
+            self.logsegment = 0 #How often the binary log moved on to a new file, because objects were inserted or removed. See logpath().
+            self.steps = 0 #How many steps the simulation has run.
+            self.engine = engine #"object" calls every object each step, "array" advances the whole stack with numpy arrays, which only pays off from about 15 objects up (see ArrayEngine.py), "adaptive" also picks the length of every step itself (see Adaptive.py), "fused" runs many steps per call compiled with numba, and is the fastest at every size (see Fused.py), "implicit" takes backward Euler steps that stay stable at any stepsPerSecond (see Implicit.py), "viewfactor" exchanges radiation through emissivities and view factors between any surfaces, and needs scipy (see ViewFactor.py).
+            self.batch = batch #Most steps the fused engine runs per call. It also stops to log, save checkpoints, check the stop conditions and draw.
+            self.array_engine = None #The ArrayEngine, built on the first update once create() has added all the objects.
+            self.exchange = None #Emissivities, transmissivities and view factors of the surfaces, for the view factor engine (see ViewFactor.py). None is the stack as the objects see it.
+            self.tolerance = tolerance #Relative error allowed per step by the adaptive engine, and how precisely the implicit engine solves every step.
+            self.stop_rate = stop_rate #Stop once no temperature changes faster than this, in Kelvin per second. None never stops on it.
+            self.stop_imbalance = stop_imbalance #Stop once the watts put in by heat sources and the watts lost to space differ by less than this. None never stops on it.
+            self.time = 0 #How many seconds have been simulated.
+            self.checkpoint = checkpoint #File to save the complete state of the simulation to, so a killed run can be resumed with Checkpoint.load(). None turns checkpoints off.
+            self.checkpointevery = checkpointevery #Save a checkpoint every Nth step, and when the run ends.
+            self.stats = None #Time and call count of every phase of a run (see Stats.py). None when stats are off, which costs next to nothing.
+            if stats: #stats=True, or a Stats object to count into.
+                import Stats
+                self.stats = stats if isinstance(stats, Stats.Stats) else Stats.Stats(file=statsfile, every=statsevery) #With statsevery, dump the stats every that many seconds, to statsfile or the screen.
+            self.profile = profile #File to write a cProfile profile of main() to. None turns profiling off.
+            self.watts_to_space = 0 #Watts lost to space over the last step.
+            self.previous = None #Time, temperatures and Joules lost to space after the previous step, to check whether the simulation has settled.
+            self.snapshotevery = None #Steps between snapshots while iter_steps runs, or None.
+            self.history = None #The most recent snapshots of iter_steps, when it keeps any (see Stream.py).
             if self.draw_enabled:
-                pygame.display.init()   #Initialize the pygame display module.
-                self.screen = pygame.display.set_mode((1500, 400)) #Sets the size of the display in terms of number of pixels. Width, then height.
-                self.clock = pygame.time.Clock() #Starts the gameclock, which sets the speed of the simulation.
+                from Renderer import Renderer #Only load pygame when we draw, so headless runs never import it.
+                self.renderer = Renderer(self, fps) #Opens the window, and draws at most fps frames per second (None draws every step), so the physics runs at full speed in between.
             self.running = True #A variable we can use a switch to shut the Simulation off if we need to.
-            self.slots = [] #A list to hold all of our blackbody objects, mirrors, and heat sources. Order of creation determines order of the ojects in space
+            self.slots = Slots() #A list to hold all of our blackbody objects, mirrors, and heat sources. Order of creation determines order of the ojects in space
+            self.linked = -1 #The version of the slots when every object's neighbours were last worked out. See link().
             self.JoulesLostToSpace = 0 #A variable to keep track of how much energy has been lost to space over the course of the simulation.
             self.prevJoulesLostToSpace = 0 #A variable to keep track of how much energy has been lost to space in the previous mili-second of the simulation.
+            self.JoulesInput = 0 #Energy put in by heat sources over the course of the simulation.
+            self.JoulesClamped = 0 #Energy added by clamping temperatures to 0K. Energy conservation says this stays 0, so it is how much the integration leaked.
+            self.initial_energy = 0 #Energy in the system when the ledger was last counted, less what went in and out before that. See recount().
+            self.counted = None #The version of the slots when the ledger was last counted. Counted again when objects are added, replaced, swapped or removed.
+            self.unaccounted = 0 #Energy the objects held at the last audit that the ledger does not know about. See audit().
+            self.audited = 0 #The step of the last audit.
+            self.auditevery = auditevery #With drift_tolerance, audit the ledger against the objects every Nth step.
+            self.drift_tolerance = drift_tolerance #Warn once the energy drift is more than this fraction of the energy that went through the system. None never checks.
+            self.drift_alarm = None #The step the drift alarm went off at, or None.
             self.stepsPerSecond = 1000 #How many steps we simulate per second of real time.
 
+    #Where the radiation an object emits ends up only depends on its neighbours, so we work it out once, instead of searching the list of objects every step.
+    #Every object gets emits_left and emits_right: the object the radiation arrives at (None when it is lost to space), and whether it arrives at that object's right side.
+    #Adding, inserting or removing objects only changes the neighbours around them, so only those are worked out again.
+
+    def link(self, index): #Work out where the radiation emitted by the object at index ends up.
+        slots = self.slots
+        if index < 0 or index > len(slots) - 1:
+            return
+        object = slots[index]
+        if index - 1 < 0: #If there is no object to the left...
+            object.emits_left = (None, False) #...then the radiation is lost to space.
+        elif slots[index - 1].tag == "M": #If the object to the left is a mirror...
+            object.emits_left = (object, False) #...the radiation bounces back into the left side of this object.
+        else:
+            object.emits_left = (slots[index - 1], True) #Radiation going left arrives at the right side of the previous object.
+        if index + 1 > len(slots) - 1: #If there is no object to the right...
+            object.emits_right = (None, False) #...then the radiation is lost to space.
+        elif slots[index + 1].tag == "M": #If the object to the right is a mirror...
+            object.emits_right = (object, True) #...the radiation bounces back into the right side of this object.
+        else:
+            object.emits_right = (slots[index + 1], False) #Radiation going right arrives at the left side of the next object.
+
+    def relink(self): #Work out the neighbours of every object.
+        for index in range(len(self.slots)):
+            self.link(index)
+        self.linked = self.slots.version
+
+    def add(self, object): #Add an object at the right end of the stack. Every object calls this when it is created.
+        linked = self.linked == self.slots.version #Whether every neighbour was up to date before.
+        self.slots.append(object)
+        self.link(len(self.slots) - 2) #The object that used to be on the right end has a new neighbour.
+        self.link(len(self.slots) - 1)
+        if linked:
+            self.linked = self.slots.version
+
+    def insert(self, index, object): #Move an object to position index in the stack, e.g. simulation.insert(0, Blackbody(simulation)) adds a blackbody on the left end. Works mid-run.
+        self.sync() #The array engine's state belongs to the objects where they are now.
+        for position, other in enumerate(self.slots): #Take it out of where it is now, normally the right end where it was added.
+            if other is object:
+                del self.slots[position]
+                self.link(position - 1)
+                self.link(position)
+                break
+        self.slots.insert(index, object)
+        index = self.slots.index(object)
+        for neighbour in (index - 1, index, index + 1):
+            self.link(neighbour)
+        self.restacked()
+
+    def remove(self, object): #Take an object out of the stack. Its energy, and any radiation waiting to be absorbed by it, leave with it. Works mid-run.
+        self.sync()
+        index = next(position for position, other in enumerate(self.slots) if other is object)
+        del self.slots[index]
+        self.link(index - 1)
+        self.link(index)
+        self.restacked()
+
+    def restacked(self): #Bring everything that depends on the order of the objects up to date, after inserting or removing objects.
+        logging = self.logger is not None
+        if logging: #The header of a binary log describes the objects, so the log carries on in a new file with a new header.
+            self.logger.close()
+            self.logger = None
+            self.logsegment += 1
+        self.linked = self.slots.version
+        if self.array_engine is not None: #The array engine packs the objects in order, so pack them again.
+            self.array_engine.pack()
+        self.recount() #Objects came or went with their energy, which is not drift.
+        if self.draw_enabled: #Spread the objects across the window again.
+            self.renderer.layout = None
+        if logging: #Start the new file from the new stack.
+            self.log()
+
     def draw(self): #A method Games can do. It draws everything that should be on the screen to the screen, then updates the screen.
-            self.screen.fill((0, 0, 0)) #black out the screen. This removes the last drawing we made, so we start with a fresh black canvas.
-            for object in self.slots: #For each object in our list of objects...
-                object.draw() #Tell that object to draw itself.
-            font = pygame.font.SysFont('arialblack', 15) #Create a font object with the specified font and size.
-            watts_in = sum([obj.watts for obj in self.slots if isinstance(obj, HeatSource)]) #Calculate total watts input from all heat sources.
-            img = font.render(f"Lost to space: {self.JoulesLostToSpace:.2f} J, Watts to space: {(self.JoulesLostToSpace-self.prevJoulesLostToSpace)*self.stepsPerSecond:.2f} W, System:  {self.calc_energy():.2f} J, Watts to System: {watts_in} W,  Total: {self.JoulesLostToSpace + self.calc_energy():.2f}", True, (255, 255, 255)) #Render the temperature text.
-            self.screen.blit(img, (10, 300))
+            self.renderer.draw() #The renderer knows how to draw every type of object.
             self.prevJoulesLostToSpace = self.JoulesLostToSpace #Save the current Joules lost to space for the next update cycle.
-            pygame.display.update() #Update the screen to show the new drawing.
 
     def events(self): #When called, Simulation checks if any input (clicking the x button, hitting a specific key, etc) needs acting on, and acts on it.
-        for event in pygame.event.get(): #For each event pygame has as occuring...
-            if event.type == pygame.QUIT: #If that event is the type of event that comes when the user hits the x button....
-                self.running=False #Flips our switch to stop running the simulation. This closes the simulation, and the window.
+        if not self.renderer.events(): #The user hit the x button...
+            self.running=False #Flips our switch to stop running the simulation. This closes the simulation, and the window.
 
     def update(self): #Anything that changes in the simulation, happens here.  
+        if self.engine in ("array", "adaptive", "implicit", "viewfactor"): #The array engines advance every object at once.
+            if self.array_engine is None: #Pack the objects into arrays the first time we update. Only import numpy when an array engine is used.
+                if self.engine == "array":
+                    from ArrayEngine import ArrayEngine
+                    self.array_engine = ArrayEngine(self)
+                elif self.engine == "adaptive": #The adaptive engine picks the length of every step itself, as long as its error allows.
+                    from Adaptive import AdaptiveEngine
+                    self.array_engine = AdaptiveEngine(self, self.tolerance)
+                elif self.engine == "implicit": #The implicit engine takes backward Euler steps, which stay stable however long they are.
+                    from Implicit import ImplicitEngine
+                    self.array_engine = ImplicitEngine(self, self.tolerance)
+                else: #The view factor engine exchanges radiation between any surfaces, through simulation.exchange.
+                    from ViewFactor import ViewFactorEngine #Only import scipy when the view factor engine is used.
+                    self.array_engine = ViewFactorEngine(self)
+            if self.stats is not None:
+                mark = self.stats.clock()
+                self.array_engine.step()
+                self.stats.add("step", mark)
+                return
+            self.array_engine.step()
+            return
+        if self.engine == "fused": #The fused engine, one step at a time. main() lets it run many steps at once, see advance().
+            self.advance(1)
+            return
+        if self.linked != self.slots.version: #Objects were added, replaced or swapped in the list by hand, so work out their neighbours.
+            self.relink()
+        if self.counted != self.slots.version: #Every object needs its own ledger before it moves energy around.
+            self.recount()
+        stats = self.stats
+        if stats is not None: #Time each phase of the step.
+            mark = stats.clock()
         for object in self.slots: #For each object in our list of objects...
             object.emit_radiation() #Tell that object to emit radiation.
+        if stats is not None:
+            mark = stats.add("emit", mark)
         for object in self.slots: #For each object in our list of objects...
             if isinstance(object, TwoSidedBlackbody): #Only TwoSidedBlackbodies conduct heat between their two sides.
                 object.conduct() #Tell that object to conduct heat between its two sides.
+        if stats is not None:
+            mark = stats.add("conduct", mark)
         for object in self.slots: #For each object in our list of objects...
             object.absorb_radiation() #Tell that object to absorb radiation.
+        if stats is not None:
+            stats.add("absorb", mark)
+        self.time += 1 / self.stepsPerSecond
             
+    def advance(self, steps=None): #Take as many steps as we can before we have to log or save a checkpoint, up to batch, and return how many. Only the fused engine takes more than one.
+        if self.engine != "fused":
+            self.update()
+            return 1
+        if self.array_engine is None: #Pack the objects into arrays the first time we update.
+            from Fused import FusedEngine #Only import numba when the fused engine is used.
+            self.array_engine = FusedEngine(self)
+        if steps is None:
+            steps = min(self.batch, int(-(-self.maxSteps // 1))) #Never run past maxSteps.
+            if (self.stop_rate is not None or self.stop_imbalance is not None) and not self.array_engine.compiled: #Without numba, check the stop conditions after every step, like on the other engines. Compiled, the fused engine checks them itself.
+                steps = 1
+            if self.logfile is not None: #Stop at the next step we log.
+                steps = min(steps, self.logevery - self.steps % self.logevery)
+            if self.checkpoint is not None: #Stop at the next checkpoint.
+                steps = min(steps, self.checkpointevery - self.steps % self.checkpointevery)
+            if self.snapshotevery is not None: #Stop at the next snapshot of iter_steps.
+                steps = min(steps, self.snapshotevery - self.steps % self.snapshotevery)
+            steps = max(steps, 1)
+        if self.stats is not None:
+            mark = self.stats.clock()
+            steps = self.array_engine.run(steps)
+            self.stats.add("step", mark)
+            return steps
+        return self.array_engine.run(steps)
+
     def create(self): #This method sets up the initial state of the simulation. It is called once at the start of the simulation.
 
         #Blackbody(self) creates a blackbody object. It absorbs all radiation, and emits according to the SB law. It has a temperature, mass, and specific heat
@@ -499,17 +635,154 @@ class Simulation: #This is the main class. It contains all the code for running
 
 
         
+    #The energy ledger. Radiation moving between objects, and conduction, only move energy around inside the system. Energy only enters through heat sources (JoulesInput),
+    #leaves to space (JoulesLostToSpace), or appears when a temperature is clamped to 0K (JoulesClamped). The objects add to these as it happens, so the energy in the system
+    #is initial_energy + JoulesInput - JoulesLostToSpace + JoulesClamped, without walking the objects. It includes radiation still waiting to be absorbed, which is none between steps.
+    #On the object engine every object also keeps its own ledger, stored: the energy it should hold, changed by every Joule it emits, receives, gets from a heat source or
+    #from clamping. audit() walks the objects, and compares the energy they really hold against the ledger, so it catches any leak the ledger does not know about,
+    #and objects changed by hand. energy_drift() is what clamping created plus what the last audit found. The loop audits every auditevery steps when drift_tolerance is set.
+
+    def held(self, object): #The energy one object holds, and the radiation waiting to be absorbed by it.
+        if object.tag in ("BB", "HS"): #Blackbodies and heat sources have a single temperature.
+            energy = object.mass * object.specific_heat * object.temperature #E = m*c*T
+        elif object.tag in ("TSBB", "TCBB"): #Two sided blackbodies have two sides with different temperatures.
+            energy = object.mass_left * object.specific_heat_left * object.temperature_left + object.mass_right * object.specific_heat_right * object.temperature_right #E = m*c*T for both sides.
+        else: #Mirrors and voids have no temperature.
+            energy = 0
+        if object.tag != "M": #Mirrors never hold radiation.
+            energy += object.incoming_radiation_left + object.incoming_radiation_right
+        return energy
+
+    def count_energy(self): #Walk every object, and add up the energy they hold, and the radiation waiting to be absorbed.
+        return sum(self.held(object) for object in self.slots)
+
+    def recount(self): #Count the energy in the objects, and start the ledger from it. Call this after changing objects by hand.
+        self.sync() #Bring the objects up to date with the array engine.
+        total_energy = 0
+        for object in self.slots: #Start the ledger of every object from what it holds.
+            object.stored = self.held(object)
+            total_energy += object.stored
+        self.initial_energy = total_energy - self.JoulesInput + self.JoulesLostToSpace - self.JoulesClamped
+        self.counted = self.slots.version
+        self.unaccounted = 0
+        self.audited = self.steps
+
+    def audit(self): #Compare the energy the objects really hold against the ledger. Returns the energy the ledger does not know about, and keeps it for energy_drift().
+        if self.counted != self.slots.version: #Objects were added, replaced, swapped or removed since we last counted.
+            self.recount()
+        if self.engine != "object": #The array engines keep no ledger per object. Once they run, they have every temperature in one array, and add it up in one go.
+            energy = self.array_engine.energy() if self.array_engine is not None else self.count_energy()
+            self.unaccounted = energy - (self.initial_energy + self.JoulesInput - self.JoulesLostToSpace + self.JoulesClamped)
+        else: #Compare every object against its own ledger.
+            self.unaccounted = sum(self.held(object) - object.stored for object in self.slots)
+        self.audited = self.steps
+        return self.unaccounted
+
+    def leaks(self): #For every object, the energy it holds that its own ledger does not know about. Only the object engine keeps a ledger per object.
+        if self.engine != "object":
+            raise ValueError("Only the object engine keeps a ledger per object.")
+        if self.counted != self.slots.version:
+            self.recount()
+        return [self.held(object) - object.stored for object in self.slots]
+
     def calc_energy(self): #A method to calculate the total energy in the system. 
-        total_energy = 0 #Start with zero energy.
-        for object in self.slots: #For each object in our list of objects...
-            if isinstance(object, Blackbody) or isinstance(object, HeatSource): #Only blackbodies and heat sources have thermal energy.
-                total_energy += object.mass * object.specific_heat * object.temperature #E = m*c*T
-            elif isinstance(object, TwoSidedBlackbody): #TwoSidedBlackbodies have two sides with different temperatures.
-                total_energy += object.mass_left * object.specific_heat_left * object.temperature_left #E = m*c*T for the left side.
-                total_energy += object.mass_right * object.specific_heat_right * object.temperature_right #E = m*c*T for the right side.
+        if self.stats is not None: #Time it on its own.
+            mark = self.stats.clock()
+        if self.array_engine is not None: #The array engines have every temperature in one array, and add it up in one go.
+            total_energy = self.array_engine.energy()
+        else:
+            if self.counted != self.slots.version: #Objects were added, replaced, swapped or removed since we last counted.
+                self.recount()
+            total_energy = self.initial_energy + self.JoulesInput - self.JoulesLostToSpace + self.JoulesClamped
+        if self.stats is not None:
+            self.stats.add("calc_energy", mark)
         return total_energy 
+
+    def energy_drift(self, audit=True): #How much energy the simulation created (positive) or destroyed (negative), against energy conservation: what clamping created, plus what the ledger does not know about. audit=False uses the last audit instead of walking the objects.
+        if audit:
+            self.audit()
+        return self.JoulesClamped + self.unaccounted
+
+    def drifting(self): #Whether the energy drift at the last audit is more than drift_tolerance of the energy that went through the system.
+        scale = abs(self.initial_energy) + abs(self.JoulesInput) + abs(self.JoulesLostToSpace)
+        return abs(self.energy_drift(audit=False)) > self.drift_tolerance * max(scale, 1e-300)
     
+    def solve_steady_state(self, tolerance=1e-12, max_iterations=100): #Jump straight to the temperatures the simulation settles at, instead of stepping there. Sets every object to them, and returns the temperature of each object and the watts lost to space.
+        import SteadyState #Only import numpy when the solver is used.
+        self.sync() #Start from the current state of the objects.
+        temperature, engine = SteadyState.solve(self, tolerance, max_iterations)
+        engine.temperature[:] = temperature
+        engine.incoming[:] = 0 #Nothing is waiting to be absorbed at steady state.
+        watts = [(object, object.watts) for object in self.slots if object.tag == "HS"] #The solver fades decaying heat sources to 0 watts. Only the temperatures are the steady state, so put the watts back.
+        engine.unpack() #Write the steady state into the objects.
+        for object, value in watts:
+            object.watts = value
+        if self.array_engine is not None: #Let the array engine continue from the steady state.
+            self.array_engine.pack()
+        return SteadyState.by_object(engine, temperature), float(SteadyState.lost(engine, temperature)) #For each object: its temperature, a (left, right) pair for two sided blackbodies, or None for mirrors and voids.
+
+    def steady_state_sensitivity(self, tolerance=1e-12, max_iterations=100): #How much every steady state temperature, and the watts lost to space, change per unit of every parameter: watts, mass, specific_heat, conductivity, area and width. Does not change the objects.
+        import SteadyState #Only import numpy when the solver is used.
+        self.sync() #Start from the current state of the objects.
+        temperature, engine, parameters, temperatures, watts = SteadyState.sensitivity(self, tolerance, max_iterations)
+        return {parameter: {"temperatures": SteadyState.by_object(engine, temperatures[:, number]), "watts_to_space": float(watts[number])} for number, parameter in enumerate(parameters)} #By (object index, parameter name). Temperatures per object, like solve_steady_state.
+
+    def save_checkpoint(self, path=None): #Save the complete state of the simulation to path, or to the checkpoint file. Checkpoint.load(path) rebuilds it.
+        import Checkpoint #Only load checkpointing when it is used.
+        Checkpoint.save(self, path or self.checkpoint)
+
+    def cell_temperatures(self): #Every temperature in the simulation, left to right. One for blackbodies and heat sources, two for two sided blackbodies, none for mirrors and voids.
+        if self.array_engine is not None: #The array engine already has them in this order.
+            return self.array_engine.temperature.tolist()
+        values = []
+        for object in self.slots: #For each object in our list of objects...
+            if object.tag in ("BB", "HS"):
+                values.append(object.temperature)
+            elif object.tag in ("TSBB", "TCBB"):
+                values += [object.temperature_left, object.temperature_right]
+        return values
+
+    def converged(self): #Check whether the simulation has settled, going by stop_rate and stop_imbalance. Compares against the state after the previous call.
+        temperatures = self.cell_temperatures()
+        previous, self.previous = self.previous, (self.time, temperatures, self.JoulesLostToSpace)
+        if previous is None or self.time <= previous[0]: #We need two steps to compare.
+            return False
+        seconds = self.time - previous[0]
+        if self.stop_rate is not None: #Is any temperature still changing too fast?
+            rate = max((abs(new - old) for new, old in zip(temperatures, previous[1])), default=0) / seconds
+            if rate > self.stop_rate:
+                return False
+        if self.stop_imbalance is not None: #Is there still more or less energy going in than out?
+            if self.array_engine is not None: #The array engines keep the watts of the heat sources up to date, not the objects.
+                watts_in = self.array_engine.watts.sum()
+            else:
+                watts_in = sum([obj.watts for obj in self.slots if obj.tag == "HS"]) #Calculate total watts input from all heat sources.
+            watts_out = (self.JoulesLostToSpace - previous[2]) / seconds
+            if abs(watts_in - watts_out) > self.stop_imbalance:
+                return False
+        return True
+
+    def sync(self): #Copy the array engine's state back into the objects, so code that reads the objects sees the current state. Does nothing for the object engine.
+        if self.array_engine is not None:
+            self.array_engine.unpack()
+
+    def logpath(self): #The file the binary log writes to: logfile, then Simulation-log.1.bin, Simulation-log.2.bin and so on after every insert or remove.
+        if not self.logsegment:
+            return self.logfile
+        import os
+        root, extension = os.path.splitext(self.logfile)
+        return f"{root}.{self.logsegment}{extension}"
+
     def log(self): #Log simulation data to file.
+        if self.logfile is None or self.steps % self.logevery: #Logging is turned off, or this is not a step we log.
+            return
+        self.sync() #Logging reads the objects, so bring them up to date.
+        if self.logformat == "binary": #Write a binary record instead of a line of text.
+            import BinaryLog #Only load the binary log when it is used.
+            if self.logger is None: #Open the log file on the first log.
+                self.logger = BinaryLog.BinaryLog(self.logpath(), [object.tag for object in self.slots], self.stepsPerSecond, self.logevery)
+            self.logger.write(self.steps, self.cell_temperatures(), self.JoulesLostToSpace, self.calc_energy())
+            return
         with open(self.logfile, 'a') as f: #Open the log file in append mode.
             for object in self.slots: #For each object in our list of objects...
                 if isinstance(object, Blackbody): #Only blackbodies and heat sources have a single temperature.
@@ -527,22 +800,92 @@ class Simulation: #This is the main class. It contains all the code for running
             f.write(f"{self.JoulesLostToSpace:.6f}, {self.calc_energy():.6f}\n") #Write the Joules lost to space and total energy in the system to the log file.
 
     def main(self): #The heart of our simulation. This is what the computer is executing while our simulation is running.
+        if self.profile is not None: #Run main under cProfile, and write the profile to disk, even if the run fails.
+            import cProfile
+            profiler, path, self.profile = cProfile.Profile(), self.profile, None #Turn profiling off while we run, so the call below runs the simulation itself.
+            try:
+                profiler.runcall(self.main)
+            finally:
+                profiler.dump_stats(path)
+                self.profile = path
+            return
+        for _ in self.loop(): #Run the loop to the end, without looking at the steps in between.
+            pass
+
+    def iter_steps(self, every=1, history=None): #Run the simulation like main(), yielding a read-only Snapshot (see Stream.py) of the starting state and of every Nth step. Nothing runs while the caller works on a snapshot, and stopping early ends the run like main() does.
+        import Stream #Only load the snapshots when they are used.
+        self.history = Stream.History(history) if history else None #The last history snapshots, oldest first. None keeps none.
+        self.snapshotevery = every #The fused engine stops at every snapshot too.
+        steps = self.loop()
+        try:
+            last = None #Step of the last snapshot, so the final step is never yielded twice.
+            for _ in steps:
+                if self.steps % every == 0 or not self.running: #Also yield the final step, even if it is not a multiple of every.
+                    if self.steps != last:
+                        last = self.steps
+                        snapshot = Stream.snapshot(self)
+                        if self.history is not None:
+                            self.history.append(snapshot)
+                        yield snapshot
+        finally:
+            steps.close() #Sync, save the final checkpoint and close the log, even when the caller stopped early.
+            self.snapshotevery = None
+
+    def loop(self): #The steps of main(), as a generator. Yields once the starting state is logged, and after every step.
+        stats = self.stats #None when stats are off.
+        self.recount() #Start the energy ledger from the objects, in case they were changed by hand.
         self.log() #Log initial state to file.
-        while self.running: #Infinite loop. We will do these things over and over on repeat until our self.running variable gets set to False.
-            self.update() #Update all of the things that move/change
-            self.log() #Log simulation data to file.
-            self.maxSteps -= 1 #Decrease the number of steps remaining.
-            if self.maxSteps <= 0: #If we have reached the maximum number of steps...
-                self.running = False #Stop the simulation.
-            if self.draw_enabled:
-                self.events() #Check for any new events we need to act on
-                self.draw() #Redraw the screen, since things may have moved/changed.
-                #self.clock.tick(60) #60FPS. This just tells python to wait. The simulation is only allowed to execute this line 60 times per second.
+        try:
+            yield
+            while self.running: #Infinite loop. We will do these things over and over on repeat until our self.running variable gets set to False.
+                if stats is not None:
+                    mark = stats.clock()
+                lost, time = self.JoulesLostToSpace, self.time #Remember where we were, to work out the watts lost to space this step.
+                taken = self.advance() #Update all of the things that move/change
+                self.steps += taken #Count the steps we just took.
+                self.watts_to_space = (self.JoulesLostToSpace - lost) / (self.time - time)
+                if stats is not None:
+                    mark = stats.add("update", mark)
+                self.log() #Log simulation data to file.
+                if stats is not None:
+                    mark = stats.add("log", mark)
+                self.maxSteps -= taken #Decrease the number of steps remaining.
+                if self.checkpoint is not None and self.steps % self.checkpointevery == 0: #Save the state every so often, so a killed run loses little.
+                    self.save_checkpoint()
+                    if stats is not None:
+                        mark = stats.add("checkpoint", mark)
+                if self.drift_tolerance is not None and (self.steps - self.audited >= self.auditevery or self.maxSteps <= 0): #Walk the objects every so often, and after the last step, to catch leaks the ledger does not know about.
+                    self.audit()
+                if self.drift_tolerance is not None and self.drift_alarm is None and self.drifting(): #The integration leaks energy. Warn once.
+                    self.drift_alarm = self.steps
+                    import warnings
+                    warnings.warn(f"Energy drift of {self.energy_drift():.6g} J at step {self.steps} is more than drift_tolerance={self.drift_tolerance}. Try more stepsPerSecond.", RuntimeWarning)
+                if self.maxSteps <= 0: #If we have reached the maximum number of steps...
+                    self.running = False #Stop the simulation.
+                if (self.stop_rate is not None or self.stop_imbalance is not None) and self.converged(): #If the simulation has settled...
+                    self.running = False #Stop the simulation.
+                if stats is not None:
+                    mark = stats.add("stop", mark)
+                if self.draw_enabled and self.renderer.due(): #Only draw when the next frame is due, instead of after every step.
+                    self.events() #Check for any new events we need to act on
+                    self.sync() #Drawing reads the objects, so bring them up to date.
+                    self.draw() #Redraw the screen, since things may have moved/changed.
+                    if stats is not None:
+                        stats.add("draw", mark)
+                if stats is not None:
+                    stats.step(self.steps)
+                yield
+        finally:
+            self.sync() #Leave the objects holding the final state.
+            if self.checkpoint is not None: #Save the final state, to resume or warm start from.
+                self.save_checkpoint()
+            if self.logger is not None: #Write out whatever the binary log still has buffered.
+                self.logger.close()
+                self.logger = None
             
 if __name__ == "__main__": #This code only runs if we are running this file directly, and not importing it as a module in another file.
-    pygame.init() #Initialize all of pygame's modules. This must be done before we can use any pygame functions.
     simulation = Simulation(draw=False, logfile='Wire-log.dat') #First, we make a Simulation object, calling its constructor. We save it to a variable so can access it later.
     simulation.create() #We point to our simulation object and tell it to execute its create method. This builds the initial world and sets things up.
     simulation.main() #We point to our simulation object and tell it to execute its main method. This method contains an infinite loop and will continue to run while they are playing.
     if simulation.draw_enabled:
-        pygame.quit() #We can only make it to here if the infinite loop from main ended, which means we want to stop the simulation, so we quit.
\ No newline at end of file
+        simulation.renderer.close() #We can only make it to here if the infinite loop from main ended, which means we want to stop the simulation, so we close the window.
\ No newline at end of file
@@ -0,0 +1,72 @@
+import collections   #The sliding window of recent steps.
+import json   #Periodic dumps are written as one JSON line each.
+import time   #All timings use time.perf_counter.
+
+#Counters and timers for every phase of a run. Simulation(stats=True) creates a Stats object as simulation.stats. With stats off, simulation.stats is None,
+#and every phase costs one extra "is not None" check. The phases are: update, with its parts emit, conduct and absorb (object engine) or step (array engines),
+#then log, stop (checking the stop conditions), checkpoint and draw. calc_energy is timed on its own as well, and is part of log or draw when they call it.
+
+class Stats: #Cumulative time and call count per phase, and steps per second over a sliding window.
+
+    def __init__(self, window=1.0, file=None, every=None): #window is how many seconds of recent steps to work out steps per second over. With every, dump the stats every that many seconds, to file, or print them if file is None.
+        self.clock = time.perf_counter #The clock every timing uses.
+        self.seconds = collections.defaultdict(float) #Cumulative time per phase, in seconds.
+        self.calls = collections.defaultdict(int) #How often each phase ran.
+        self.window = window #Length of the sliding window in seconds.
+        self.recent = collections.deque() #(time, steps) of the steps in the sliding window.
+        self.started = self.clock() #When timing started.
+        self.steps = 0 #Steps counted so far.
+        self.file = file #File to append periodic dumps to. None prints them.
+        self.every = every #Seconds between dumps. None never dumps.
+        self.last_dump = self.started #When we last dumped.
+
+    def add(self, phase, start): #Count a phase that started at start (from self.clock()). Returns the time now, so the next phase can start from it.
+        now = self.clock()
+        self.seconds[phase] += now - start
+        self.calls[phase] += 1
+        return now
+
+    def step(self, steps): #Count a finished step. steps is the step count of the simulation.
+        now = self.clock()
+        self.steps = steps
+        recent = self.recent
+        recent.append((now, steps))
+        while len(recent) > 2 and recent[0][0] < now - self.window: #Forget steps that fell out of the window.
+            recent.popleft()
+        if self.every is not None and now - self.last_dump >= self.every:
+            self.last_dump = now
+            self.dump()
+
+    def steps_per_second(self): #Steps per second over the sliding window.
+        if len(self.recent) < 2:
+            return 0.0
+        (start, first), (end, last) = self.recent[0], self.recent[-1]
+        return (last - first) / (end - start) if end > start else 0.0
+
+    def summary(self): #Everything we counted, as a dict.
+        wall = self.clock() - self.started
+        return {
+            "wall": wall, #Seconds since timing started.
+            "steps": self.steps,
+            "steps_per_second": self.steps_per_second(), #Over the sliding window.
+            "average_steps_per_second": self.steps / wall if wall > 0 else 0.0, #Over the whole run.
+            "phases": {phase: {"seconds": self.seconds[phase], "calls": self.calls[phase], "fraction": self.seconds[phase] / wall if wall > 0 else 0.0} for phase in self.seconds},
+        }
+
+    def dump(self): #Append the summary to the file as a line of JSON, or print it.
+        if self.file is None:
+            print(self, flush=True)
+            return
+        with open(self.file, 'a') as f:
+            f.write(json.dumps(self.summary()) + "\n")
+
+    def reset(self): #Forget everything counted so far.
+        self.__init__(self.window, self.file, self.every)
+
+    def __str__(self): #A table of the phases, slowest first.
+        summary = self.summary()
+        lines = [f"{summary['steps']} steps in {summary['wall']:.3f} s, {summary['steps_per_second']:.1f} steps/s now, {summary['average_steps_per_second']:.1f} steps/s on average"]
+        for phase, counts in sorted(summary["phases"].items(), key=lambda item: -item[1]["seconds"]):
+            per_call = counts["seconds"] / counts["calls"] * 1e6 if counts["calls"] else 0.0
+            lines.append(f"  {phase:12s} {counts['seconds']:10.4f} s {100 * counts['fraction']:6.1f}% {counts['calls']:10d} calls {per_call:10.2f} us/call")
+        return "\n".join(lines)
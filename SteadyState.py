@@ -0,0 +1,196 @@
+import numpy as np   #Import numpy for the linear algebra.
+
+from ArrayEngine import ArrayEngine, SB_CONSTANT #The steady state solver works on the same packed cells as the array engine.
+
+#At steady state one step of the simulation no longer changes any temperature. We write one step as the energy every cell gains, which is a smooth function of the temperatures,
+#and find where it is zero for every cell with Newton's method. Because we solve the exact same step the time-stepper takes, we get the same temperatures it converges to.
+#Heat sources are taken at their current watts. A decaying heat source fades to nothing, so it only adds the Joules it has left to put in: the cells it leaks to space from cool to 0K,
+#and an isolated group shares them out with the energy it already holds. A heat source that grows without end has no steady state.
+
+def gain(engine, temperature, stepsPerSecond): #The energy each cell gains in one step, in Joules. Zero for every cell at steady state.
+    h = 1 / stepsPerSecond #Length of one step in seconds.
+    emission = SB_CONSTANT * h * temperature**4 #Energy emitted out of each face of each cell this step.
+    received = np.bincount(engine.target, weights=emission[engine.source], minlength=engine.space + 1)[:-1] #Radiation arriving at each cell, without what is lost to space.
+    energy = received + engine.watts * h - engine.faces * emission
+    if engine.conducting: #TwoSidedBlackbodies conduct between their sides, using the temperatures after emission.
+        after = temperature - engine.loss * emission
+        heat_transfer = engine.conductance * h * (after[1:] - after[:-1]) # Q = k*A*ΔT/d
+        energy[:-1] += heat_transfer
+        energy[1:] -= heat_transfer
+    return energy
+
+def lost(engine, temperature): #Watts lost to space, by radiating off the ends of the stack or into voids.
+    emission = SB_CONSTANT * temperature**4 #Power emitted out of each face of each cell.
+    return emission[engine.source][engine.target == engine.space].sum()
+
+def routing(engine): #Matrix of how much of the emission of cell i ends up in cell j, as [j, i]. Radiation lost to space is left out.
+    n = engine.space
+    matrix = np.zeros((n, n))
+    inside = engine.target != engine.space
+    np.add.at(matrix, (engine.target[inside], engine.source[inside]), 1)
+    return matrix
+
+def conduction(engine, stepsPerSecond): #Matrix of the heat conducted into each cell per step, per Kelvin of each cell's temperature after emission.
+    n = engine.space
+    matrix = np.zeros((n, n))
+    if engine.conducting:
+        g = engine.conductance / stepsPerSecond
+        index = np.arange(n - 1)
+        matrix[index, index] -= g
+        matrix[index, index + 1] += g
+        matrix[index + 1, index] += g
+        matrix[index + 1, index + 1] -= g
+    return matrix
+
+def jacobian(engine, temperature, stepsPerSecond): #Derivative of gain() for every cell, with respect to the temperature of every cell, as [cell, temperature].
+    emitting = 4 * SB_CONSTANT / stepsPerSecond * temperature**3 #Derivative of each cell's emission with respect to its temperature.
+    matrix = (routing(engine) - np.diag(engine.faces)) * emitting #Radiation received, minus radiation emitted.
+    if engine.conducting:
+        matrix += conduction(engine, stepsPerSecond) * (1 - engine.loss * emitting) #Conduction works on the temperatures after emission.
+    return matrix
+
+def components(engine): #Split the cells into groups that exchange heat with each other. Returns a group number per cell.
+    group = list(range(engine.space))
+    def find(cell): #Follow the chain of groups to the one at the root.
+        while group[cell] != cell:
+            group[cell] = group[group[cell]]
+            cell = group[cell]
+        return cell
+    pairs = [(s, t) for s, t in zip(engine.source, engine.target) if t != engine.space]
+    pairs += [(cell, cell + 1) for cell in np.nonzero(engine.conductance)[0]]
+    for a, b in pairs: #Merge the groups of every two cells that exchange heat.
+        group[find(a)] = find(b)
+    return np.array([find(cell) for cell in range(engine.space)], dtype=int)
+
+def setup(engine): #Work out which cells we solve for, and a starting guess for them. Returns the temperatures, which cells are free, and for groups that neither gain nor lose energy, the cells of the group and the energy they hold.
+    temperature = engine.temperature.copy()
+    if (engine.decay > 1).any():
+        raise ValueError("A heat source grows without end (decay above 1), so the simulation has no steady state.")
+    fading = engine.decay != 1
+    remaining = np.where(fading, engine.watts * engine.decay, 0) / (engine.simulation.stepsPerSecond * (1 - np.where(fading, engine.decay, 0))) #Joules a decaying heat source has left to put in. It decays before every step, so watts*h*(decay + decay^2 + ...).
+    engine.watts[fading] = 0 #At steady state it has faded away.
+    engine.decay[fading] = 1
+    group = components(engine)
+    free = np.zeros(engine.space, dtype=bool) #Cells whose temperature we solve for.
+    constraints = [] #For groups that neither gain nor lose energy, the cells of the group, and the energy they hold.
+    for root in np.unique(group): #Work out what each group of cells settles to.
+        cells = group == root
+        heated = (engine.watts[cells] != 0).any()
+        leaking = np.isin(engine.source[engine.target == engine.space], np.nonzero(cells)[0]).any()
+        if heated and not leaking: #Nothing can carry the heat input away, so the group keeps heating up forever.
+            raise ValueError("A heat source is enclosed by mirrors, so the simulation has no steady state.")
+        if heated: #A heated group settles where its heat input balances what it loses.
+            free |= cells
+            guess = (abs(engine.watts[cells]).sum() / (2 * SB_CONSTANT))**0.25 #Temperature of a single plate radiating away all the heat input.
+            temperature[cells] = np.where(temperature[cells] > 0, temperature[cells], guess)
+        elif leaking: #A group without heat input that loses energy to space cools down to 0K.
+            temperature[cells] = 0
+        else: #An isolated group keeps its energy, and shares it out.
+            energy = (engine.capacity[cells] * temperature[cells]).sum() + remaining[cells].sum()
+            if energy > 0:
+                free |= cells
+                constraints.append((cells, energy))
+                temperature[cells] = np.maximum(temperature[cells], energy / engine.capacity[cells].sum() / 2)
+            else:
+                temperature[cells] = 0
+    return temperature, free, constraints
+
+def system(engine, temperature, stepsPerSecond, constraints): #gain() and its jacobian(), with one energy balance of each isolated group replaced by "the group keeps its energy". The balances of a group add up to zero, so we lose nothing.
+    residual = gain(engine, temperature, stepsPerSecond)
+    matrix = jacobian(engine, temperature, stepsPerSecond)
+    for cells, energy in constraints:
+        row = np.nonzero(cells)[0][-1]
+        residual[row] = (engine.capacity[cells] * temperature[cells]).sum() - energy
+        matrix[row] = np.where(cells, engine.capacity, 0)
+    return residual, matrix
+
+def solve(simulation, tolerance=1e-12, max_iterations=100): #Find the steady state of the simulation. Returns the cell temperatures, and the engine they belong to.
+    stepsPerSecond = simulation.stepsPerSecond
+    engine = ArrayEngine(simulation) #Pack the current state of the slots.
+    temperature, free, constraints = setup(engine)
+    for iteration in range(max_iterations): #Newton's method.
+        residual, matrix = system(engine, temperature, stepsPerSecond, constraints)
+        step = np.zeros(engine.space)
+        step[free] = np.linalg.solve(matrix[np.ix_(free, free)], -residual[free])
+        shrink = np.min(np.where(step < 0, -0.5 * temperature / np.where(step < 0, step, -1), 1), initial=1) #Never step more than halfway to 0K, so temperatures stay positive.
+        temperature += min(1, shrink) * step
+        if np.all(abs(step) <= tolerance * np.maximum(temperature, 1)): #Stop once the temperatures no longer change.
+            break
+    else:
+        raise RuntimeError(f"Steady state did not converge in {max_iterations} iterations.")
+    return temperature, engine
+
+def by_object(engine, values): #Split a value per cell into a value per object: one for blackbodies and heat sources, a (left, right) pair for two sided blackbodies, None for mirrors and voids.
+    result = []
+    for cells in engine.cells:
+        if not cells:
+            result.append(None)
+        elif cells[0] == cells[1]:
+            result.append(float(values[cells[0]]))
+        else:
+            result.append((float(values[cells[0]]), float(values[cells[1]])))
+    return result
+
+#Sensitivities. At steady state gain(T, p) = 0 for every parameter p, so a small change dp moves the temperatures by dT = -J^-1 (∂gain/∂p) dp, with J the jacobian.
+#For any output y(T), e.g. one temperature or the watts lost to space, dy/dp = -λ·∂gain/∂p with J^T λ = ∂y/∂T: one linear solve per output, whatever the number of parameters.
+#Parameters enter gain() through the heat input (watts), through the conductance k*A/d, and through the heat capacity m*c, which sets how far a cell cools by emitting
+#before it conducts. Isolated groups keep the energy they started with, so for them m*c also sets how much energy there is to share out.
+
+def parameters(simulation, engine): #Every parameter the steady state depends on: for every one, the index of its object, its name, and the cells it belongs to.
+    found = []
+    for index, (object, cells) in enumerate(zip(simulation.slots, engine.cells)):
+        if object.tag == "HS":
+            found.append((index, "watts", cells[0]))
+        if object.tag in ("BB", "HS"):
+            found += [(index, "mass", cells[0]), (index, "specific_heat", cells[0])]
+        elif object.tag in ("TSBB", "TCBB"):
+            found += [(index, "mass_left", cells[0]), (index, "specific_heat_left", cells[0]), (index, "mass_right", cells[1]), (index, "specific_heat_right", cells[1])]
+            if object.tag == "TSBB": #Only TwoSidedBlackbodies conduct.
+                found += [(index, "conductivity", cells[0]), (index, "area", cells[0]), (index, "width", cells[0])]
+    return found
+
+def derivative(simulation, engine, temperature, constraints, parameter): #Derivative of system() with respect to one parameter from parameters(), at the steady state.
+    index, name, cell = parameter
+    object = simulation.slots[index]
+    h = 1 / simulation.stepsPerSecond
+    column = np.zeros(engine.space)
+    capacity = 0 #Derivative of the heat capacity m*c of the cell.
+    if name == "watts":
+        column[cell] = h
+    elif name in ("conductivity", "area", "width"): #The conductance between the two sides.
+        k, area, width = object.conductivity, object.area, object.width
+        scale = {"conductivity": area / width, "area": k / width, "width": -k * area / width**2}[name] #Derivative of k*A/d.
+        emission = SB_CONSTANT * h * temperature**4
+        after = temperature - engine.loss * emission #Temperatures after emission, which conduction works on.
+        column[cell] = h * (after[cell + 1] - after[cell]) * scale
+        column[cell + 1] = -column[cell]
+    else: #The heat capacity of one cell.
+        side = name[len("specific_heat"):] if name.startswith("specific_heat") else name[len("mass"):]
+        capacity = getattr(object, ("mass" if name.startswith("specific_heat") else "specific_heat") + side) #The derivative of m*c with respect to m is c, and the other way around.
+        if engine.conducting:
+            emission = SB_CONSTANT * h * temperature[cell]**4
+            column += conduction(engine, simulation.stepsPerSecond)[:, cell] * engine.faces[cell] * emission / engine.capacity[cell]**2 * capacity #A bigger capacity cools less by emitting, before it conducts.
+    for cells, energy in constraints: #Isolated groups start from the same temperatures, so a bigger capacity holds more energy.
+        row = np.nonzero(cells)[0][-1]
+        column[row] = (temperature[cell] - engine.temperature[cell]) * capacity if cells[cell] else 0
+    return column
+
+def sensitivity(simulation, tolerance=1e-12, max_iterations=100): #How the steady state responds to every parameter. Returns the cell temperatures and the engine they belong to, like solve(), the parameters as (object index, name), and their derivatives (see below).
+    if any(object.tag == "HS" and object.decay != 1 for object in simulation.slots): #The steady state then depends on the decay, which is not one of the parameters.
+        raise ValueError("Sensitivities are not available for decaying heat sources.")
+    temperature, engine = solve(simulation, tolerance, max_iterations)
+    _, free, constraints = setup(engine)
+    _, matrix = system(engine, temperature, simulation.stepsPerSecond, constraints)
+    found = parameters(simulation, engine)
+    columns = np.zeros((engine.space, len(found))) #∂system/∂p, a column per parameter.
+    for number, parameter in enumerate(found):
+        columns[:, number] = derivative(simulation, engine, temperature, constraints, parameter)
+    outputs = np.zeros((engine.space + 1, engine.space)) #∂y/∂T, a row per output: every cell temperature, then the watts lost to space.
+    outputs[np.arange(engine.space), np.arange(engine.space)] = 1
+    leaving = engine.source[engine.target == engine.space]
+    np.add.at(outputs[-1], leaving, 4 * SB_CONSTANT * temperature[leaving]**3)
+    adjoint = np.zeros((engine.space, engine.space + 1)) #λ, a column per output. Cells we do not solve for stay at 0K, whatever the parameters.
+    if free.any():
+        adjoint[free] = np.linalg.solve(matrix[np.ix_(free, free)].T, outputs[:, free].T)
+    derivatives = -adjoint.T @ columns #dy/dp, a row per output and a column per parameter.
+    return temperature, engine, [(index, name) for index, name, _ in found], derivatives[:-1], derivatives[-1] #Cell temperatures as [cell, parameter], watts lost to space as [parameter].
@@ -0,0 +1,27 @@
+import collections   #Snapshots are named tuples, and the history is a deque that forgets the oldest snapshot once it is full.
+
+#Simulation.iter_steps(every=N) runs the simulation like main(), and yields a Snapshot of the starting state and of every Nth step, so a notebook,
+#plot or controller can follow a run live without reading a log file. A snapshot is a copy: later steps never change it, and it cannot be changed itself.
+#The simulation only runs while the caller asks for the next snapshot, so a slow consumer slows the run down instead of piling up snapshots.
+#With history=N, simulation.history also keeps the last N snapshots in memory, for e.g. a rolling plot. Nothing is written to disk.
+
+Snapshot = collections.namedtuple("Snapshot", ("steps", "time", "temperatures", "watts_to_space", "JoulesLostToSpace", "energy")) #The state of a simulation after a step. temperatures are in the order of cell_temperatures().
+
+def frozen(value): #A read-only copy of a value: lists become tuples, and numpy arrays (ensembles) become read-only copies.
+    if isinstance(value, list):
+        return tuple(value)
+    if hasattr(value, "setflags"): #A numpy array or number.
+        value = value.copy()
+        value.setflags(write=False)
+    return value
+
+def snapshot(simulation): #A Snapshot of the current state of a simulation.
+    return Snapshot(simulation.steps, frozen(simulation.time), frozen(simulation.cell_temperatures()), frozen(simulation.watts_to_space), frozen(simulation.JoulesLostToSpace), frozen(simulation.calc_energy()))
+
+class History(collections.deque): #The most recent snapshots, oldest first. Forgets the oldest one once it holds size of them.
+
+    def __init__(self, size): #We need how many snapshots to keep.
+        super().__init__(maxlen=size)
+
+    def column(self, name): #One field of every snapshot, oldest first, e.g. history.column("watts_to_space").
+        return [getattr(snapshot, name) for snapshot in self]
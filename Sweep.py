@@ -0,0 +1,145 @@
+import argparse   #For the command line interface.
+import ast   #Turns the values on the command line into numbers.
+import concurrent.futures   #The process pool that runs the simulations on all cores.
+import importlib   #Loads the scenario builder named on the command line.
+import itertools   #Builds every combination of the parameters in the grid.
+import json   #Results are written as one JSON row per configuration.
+import multiprocessing   #Workers report which configurations they started, so a dead worker is only blamed on those.
+import os   #Checks for results from an earlier run.
+import time   #Measures the wall time of every run.
+
+from Simulator import Simulation, Blackbody, HeatSource, TwoSidedBlackbody
+
+#A sweep runs a headless simulation for every combination of parameters in a grid. A scenario builder is a function that takes a Simulation and the parameters
+#of one configuration, and adds the objects, like Simulation.create does. It has to live in a module, so the worker processes can import it.
+#Every finished configuration is written to the results file straight away, so a sweep that gets killed, or has failing configurations, can be rerun and only runs what is missing.
+
+def plates(simulation, watts=400, plates=2, mass=1, specific_heat=1, conductivity=None): #Example scenario builder: a heat source with a row of plates on its right. With a conductivity, the plates are TwoSidedBlackbodies.
+    HeatSource(simulation, watts=watts, mass=mass, specific_heat=specific_heat)
+    for plate in range(plates):
+        if conductivity is None:
+            Blackbody(simulation, mass=mass, specific_heat=specific_heat)
+        else:
+            TwoSidedBlackbody(simulation, mass_left=mass / 2, mass_right=mass / 2, specific_heat_left=specific_heat, specific_heat_right=specific_heat, conductivity=conductivity)
+
+def grid(**parameters): #Every combination of the given lists of values, e.g. grid(watts=[200, 400], plates=[1, 2]) gives four configurations.
+    names = sorted(parameters)
+    return [dict(zip(names, values)) for values in itertools.product(*(parameters[name] for name in names))]
+
+def key(config): #A string that is the same for equal configurations, to recognise the ones that are already done.
+    return json.dumps(config, sort_keys=True)
+
+def run(builder, config, options, cache=None): #Run the simulation of one configuration. This is what the worker processes do. With a cache directory, scenarios that ran before are not run again.
+    start = time.perf_counter()
+    simulation = Simulation(**{"draw": False, "logfile": None, **options}) #Sweeps are always headless.
+    builder(simulation, **config)
+    if cache is None:
+        simulation.main()
+    else:
+        import Cache #Only load the cache when it is used.
+        Cache.run(simulation, Cache.ResultCache(cache))
+    return {"config": config, "temperatures": simulation.cell_temperatures(), "watts_to_space": simulation.watts_to_space, "steps": simulation.steps, "time": simulation.time, "wall_time": time.perf_counter() - start, "error": None}
+
+STARTED = None #In a worker process, the queue it reports every configuration it starts on.
+
+def report(started): #Runs once in every worker process, to hand it the queue.
+    global STARTED
+    STARTED = started
+
+def attempt(builder, config, options, cache=None): #Report that the configuration started, then run it. The report is written straight to a pipe, so it arrives even if the worker dies right after.
+    STARTED.put(key(config))
+    return run(builder, config, options, cache)
+
+def done(results): #The configurations in a results file that finished without an error.
+    finished = set()
+    if os.path.exists(results):
+        with open(results) as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError: #A line cut short when an earlier sweep was killed.
+                    continue
+                if row.get("error") is None:
+                    finished.add(key(row["config"]))
+    return finished
+
+def sweep(builder, configs, results='Sweep-results.jsonl', processes=None, retries=1, cache=None, **options): #Run every configuration on a pool of processes, writing a row per configuration to results. Configurations already in results are skipped. cache is a directory of results shared between sweeps (see Cache.py). Other keyword arguments go to Simulation.
+    finished = done(results)
+    todo = [config for config in configs if key(config) not in finished]
+    attempts = {key(config): 0 for config in todo} #How often each configuration took down a worker process it had to itself.
+    suspects = [] #Configurations that were running when a worker died. Each reruns in a pool of its own, so we know which one killed it.
+    started = multiprocessing.SimpleQueue() #Workers report every configuration they start on it.
+    with open(results, 'a') as f:
+        def write(row): #Write one row, and make sure it is on disk before moving on.
+            f.write(json.dumps(row) + "\n")
+            f.flush()
+        while todo or suspects: #A worker that dies takes the whole pool down, so we rerun what was left in new pools.
+            again = [] #Suspects that killed their worker, and have attempts left.
+            for config in suspects: #One at a time, so a dead worker can only be this configuration's fault.
+                try:
+                    with concurrent.futures.ProcessPoolExecutor(max_workers=1, initializer=report, initargs=(started,)) as pool:
+                        write(pool.submit(attempt, builder, config, options, cache).result())
+                except concurrent.futures.process.BrokenProcessPool: #It killed the worker.
+                    attempts[key(config)] += 1
+                    if attempts[key(config)] > retries:
+                        write({"config": config, "error": "worker process died"})
+                    else:
+                        again.append(config)
+                except Exception as error: #The simulation itself failed. Record it and carry on with the rest.
+                    write({"config": config, "error": f"{type(error).__name__}: {error}"})
+            while not started.empty(): #Forget the reports of the runs on their own.
+                started.get()
+            unfinished = [] #Configurations of the full pool that a dead worker took down with it.
+            if todo:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=processes, initializer=report, initargs=(started,)) as pool:
+                    futures = {pool.submit(attempt, builder, config, options, cache): config for config in todo}
+                    for future in concurrent.futures.as_completed(futures):
+                        config = futures[future]
+                        try:
+                            write(future.result())
+                        except concurrent.futures.process.BrokenProcessPool: #Some worker died. Which configurations it could have been is sorted out below.
+                            unfinished.append(config)
+                        except Exception as error: #The simulation itself failed. Record it and carry on with the rest.
+                            write({"config": config, "error": f"{type(error).__name__}: {error}"})
+            running = set() #Configurations the workers started.
+            while not started.empty():
+                running.add(started.get())
+            blamed = [config for config in unfinished if key(config) in running] #Only the configurations that were running can have killed the worker.
+            if blamed: #The ones that never started go back into a full pool.
+                todo = [config for config in unfinished if key(config) not in running]
+            else: #No report arrived, so suspect all of them.
+                blamed, todo = unfinished, []
+            suspects = again + blamed
+
+def value(text): #Turn a value from the command line into a number, None, or leave it as text.
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+if __name__ == "__main__": #Command line interface, e.g. python Sweep.py Sweep:plates --grid watts=200,400 --grid plates=1,2,4 --engine array
+    parser = argparse.ArgumentParser(description="Run headless simulations over a grid of parameters, on all cores.")
+    parser.add_argument("builder", help="Scenario builder as module:function, e.g. Sweep:plates.")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2,...", help="Values of one parameter of the builder. Repeat for more parameters.")
+    parser.add_argument("--results", default="Sweep-results.jsonl", help="File to write one JSON row per configuration to.")
+    parser.add_argument("--cache", default=None, help="Directory of cached results, so scenarios that ran in any earlier sweep are not run again.")
+    parser.add_argument("--processes", type=int, default=None, help="Number of worker processes. Defaults to the number of cores.")
+    parser.add_argument("--option", action="append", default=[], metavar="NAME=VALUE", help="Option for Simulation, e.g. maxSteps=1e5 or engine='array'. Repeat for more options.")
+    parser.add_argument("--engine", default=None, help="Shortcut for --option engine=...")
+    parser.add_argument("--maxSteps", type=float, default=None, help="Shortcut for --option maxSteps=...")
+    args = parser.parse_args()
+    module, function = args.builder.split(":")
+    builder = getattr(importlib.import_module(module), function)
+    parameters = {}
+    for entry in args.grid:
+        name, values = entry.split("=", 1)
+        parameters[name] = [value(v) for v in values.split(",")]
+    options = {}
+    for entry in args.option:
+        name, v = entry.split("=", 1)
+        options[name] = value(v)
+    if args.engine is not None:
+        options["engine"] = args.engine
+    if args.maxSteps is not None:
+        options["maxSteps"] = args.maxSteps
+    sweep(builder, grid(**parameters), args.results, args.processes, cache=args.cache, **options)
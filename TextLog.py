@@ -0,0 +1,155 @@
+import argparse   #For the command line interface.
+import os   #Replaces the converted file in one go.
+import re   #Finds the tags of the slots in the first line of a log.
+import tempfile   #Converted logs are written to a temporary file first, so a killed conversion never leaves half a file behind.
+
+import numpy as np   #Every chunk of the log is parsed straight into a numpy array.
+
+import BinaryLog #Converted logs use the binary log format, and its column names.
+
+#Reads the text logs Simulation.log writes (BB[x], HS[x], TSBB[l, r], TCBB[l, r], M, V, lost, energy) into numpy arrays, a chunk of lines at a time,
+#so files of many gigabytes never have to fit in memory. A chunk is parsed in one go: the tags, brackets and commas are stripped with bytes.translate,
+#which leaves nothing but numbers separated by spaces, and numpy reads those into an array. Mirrors and voids have no temperature, so they leave nothing.
+#Text logs do not record the step of a line, or stepsPerSecond, so pass every (the logevery of the run) and stepsPerSecond if they were not the defaults.
+#convert() writes a text log out as a binary log (see BinaryLog.py) once, so later reads memory-map it instead of parsing it again.
+
+DELETE = b"ABCDEFGHIJKLMNOPQRSTUVWXYZ[]" #The tags and brackets. Numbers never contain capital letters, not even nan and inf.
+COMMAS = bytes.maketrans(b",", b" ") #Commas become spaces.
+
+def parse(text): #The numbers in some complete lines of a text log, as one flat array.
+    return np.fromstring(text.translate(COMMAS, DELETE), sep=" ")
+
+class TextLog: #A text log file. Reads it in chunks, summarises it, and converts it to a binary log.
+
+    def __init__(self, path, every=1, stepsPerSecond=1000): #We need the log file, how many steps apart its lines are, and the stepsPerSecond of the run, to work out the step and time of every line.
+        self.path = path #The text log file.
+        self.every = every #Steps between lines, the logevery of the run.
+        self.stepsPerSecond = stepsPerSecond #Steps per second of simulated time.
+        with open(path, 'rb') as f:
+            line = f.readline()
+        if not line.endswith(b"\n"):
+            raise ValueError(f"{path} does not have a complete line.")
+        self.tags = re.findall(r"[A-Z]+", line.decode()) #The tag of every slot, from the first line.
+        self.columns = BinaryLog.columns(self.tags) #The names of the columns, the same as in a binary log: step, a column per temperature, lost and energy.
+        self.width = len(self.columns) - 1 #Numbers per line. The step is not in the file.
+
+    def select(self, columns): #The positions of the named columns. None selects every column.
+        if columns is None:
+            return list(range(len(self.columns)))
+        for name in columns:
+            if name not in self.columns:
+                raise ValueError(f"{self.path} has no column {name!r}. Its columns are {', '.join(self.columns)}.")
+        return [self.columns.index(name) for name in columns]
+
+    def chunks(self, columns=None, decimate=1, chunk_bytes=1 << 24): #Yield the log as arrays of about chunk_bytes of text each, a row per line and a column per selected column. Only keeps every decimate-th line.
+        selected = self.select(columns)
+        row = 0 #Lines read so far.
+        rest = b"" #The start of a line that continues in the next chunk.
+        with open(self.path, 'rb') as f:
+            while True:
+                data = f.read(chunk_bytes)
+                if not data: #End of the file. A last line without a newline is still being written, so leave it out.
+                    return
+                data = rest + data
+                end = data.rfind(b"\n") + 1
+                data, rest = data[:end], data[end:]
+                if not data: #No complete line yet.
+                    continue
+                lines = data.count(b"\n")
+                values = parse(data)
+                if values.size != lines * self.width: #Lines with another layout, e.g. objects were inserted, or another run appended to the log.
+                    raise ValueError(f"{self.path} changes layout after line {row + 1}. Only logs with the same objects on every line can be read.")
+                values = values.reshape(lines, self.width)
+                index = np.arange(row, row + lines)
+                row += lines
+                if decimate > 1:
+                    keep = index % decimate == 0
+                    index, values = index[keep], values[keep]
+                if not len(index):
+                    continue
+                yield np.column_stack([index * self.every, values])[:, selected]
+
+    def read(self, columns=None, decimate=1): #The whole log as one array, a row per line (every decimate-th line) and a column per selected column.
+        parts = list(self.chunks(columns, decimate))
+        if not parts:
+            return np.empty((0, len(self.select(columns))))
+        return np.concatenate(parts)
+
+    def final(self, columns=None): #The last complete line of the log, as an array of the selected columns. Only reads the end of the file, unless the step is selected.
+        size = 1 << 16
+        with open(self.path, 'rb') as f:
+            end = f.seek(0, os.SEEK_END)
+            while True: #Read back from the end of the file until we have the whole last line.
+                start = max(0, end - size)
+                f.seek(start)
+                data = f.read(end - start)
+                data = data[:data.rfind(b"\n") + 1] #A last line without a newline is still being written, so leave it out.
+                begin = data.rfind(b"\n", 0, len(data) - 1) + 1
+                if begin > 0 or start == 0:
+                    break
+                size *= 4
+        values = parse(data[begin:])
+        if values.size != self.width:
+            raise ValueError(f"The last line of {self.path} has another layout than the first one.")
+        selected = self.select(columns)
+        step = np.nan
+        if 0 in selected: #Only count the lines before it when we need its step.
+            if start == 0:
+                step = data[:begin].count(b"\n") * self.every
+            else:
+                with open(self.path, 'rb') as f:
+                    step = (sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 24), b"")) - 1) * self.every
+        return np.concatenate([[step], values])[selected]
+
+    def summary(self, columns=None, epsilon=1e-3, decimate=1): #For every selected column: its minimum, its maximum, its final value, and how many seconds in it came within epsilon of its final value to stay. Reads the log once, a chunk at a time.
+        names = [self.columns[i] for i in self.select(columns)]
+        final = self.final(names)
+        minimum = np.full(len(names), np.inf)
+        maximum = np.full(len(names), -np.inf)
+        outside = np.full(len(names), -1.0) #The step of the last line further than epsilon from the final value, or -1.
+        first = None #The step of the first line read.
+        for chunk in self.chunks(names + ["step"], decimate):
+            steps, chunk = chunk[:, -1], chunk[:, :-1]
+            if first is None:
+                first = steps[0]
+            np.minimum(minimum, chunk.min(axis=0), out=minimum)
+            np.maximum(maximum, chunk.max(axis=0), out=maximum)
+            away = abs(chunk - final) > epsilon
+            last = len(chunk) - 1 - np.argmax(away[::-1], axis=0) #The last line of this chunk that is too far away, if any is.
+            outside = np.where(away.any(axis=0), steps[last], outside)
+        if first is None:
+            raise ValueError(f"{self.path} does not have a complete line.")
+        settled = np.where(outside < 0, first, outside + self.every * decimate) #The line after the last one that was too far away.
+        return {name: {"min": float(minimum[i]), "max": float(maximum[i]), "final": float(final[i]), "settled": float(settled[i]) / self.stepsPerSecond} for i, name in enumerate(names)}
+
+    def convert(self, binaryfile, decimate=1): #Write the log out as a binary log, keeping every decimate-th line. BinaryLog.read(binaryfile) then memory-maps it.
+        directory = os.path.dirname(os.path.abspath(binaryfile))
+        handle, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                BinaryLog.write_header(f, self.tags, self.stepsPerSecond, self.every * decimate)
+                for chunk in self.chunks(decimate=decimate):
+                    f.write(chunk.astype("<f8").tobytes())
+        except BaseException: #Never leave half a file behind.
+            os.remove(temporary)
+            raise
+        os.replace(temporary, binaryfile) #Replacing is atomic, so readers see the old file or the whole new one.
+        return binaryfile
+
+if __name__ == "__main__": #Command line interface: summarise a text log, or convert it to a binary log.
+    parser = argparse.ArgumentParser(description="Summarise a text simulation log, or convert it to a binary log.")
+    parser.add_argument("logfile", help="The text log, e.g. Simulation-log.dat.")
+    parser.add_argument("--columns", nargs="+", default=None, help="Only these columns, e.g. HS0 TSBB2_left lost. Every column by default.")
+    parser.add_argument("--decimate", type=int, default=1, help="Only read every Nth line.")
+    parser.add_argument("--every", type=int, default=1, help="The logevery of the run, the steps between lines.")
+    parser.add_argument("--stepsPerSecond", type=float, default=1000, help="The stepsPerSecond of the run.")
+    parser.add_argument("--epsilon", type=float, default=1e-3, help="How close to its final value a column has to stay to count as settled.")
+    parser.add_argument("--convert", default=None, help="Write the log to this binary log file instead of summarising it.")
+    args = parser.parse_args()
+    log = TextLog(args.logfile, args.every, args.stepsPerSecond)
+    if args.convert is not None:
+        log.convert(args.convert, args.decimate)
+    else:
+        print(f"{'column':20s} {'min':>16s} {'max':>16s} {'final':>16s} {'settled (s)':>12s}")
+        for name, values in log.summary(args.columns, args.epsilon, args.decimate).items():
+            print(f"{name:20s} {values['min']:16.6f} {values['max']:16.6f} {values['final']:16.6f} {values['settled']:12.3f}")
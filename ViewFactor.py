@@ -0,0 +1,160 @@
+import numpy as np   #Import numpy for fast math on whole arrays at once.
+
+from ArrayEngine import ArrayEngine #The view factor engine works on the same packed cells as the array engine.
+
+try: #scipy is optional. Only working out the exchange matrix needs it, so surfaces and view factors can still be set, saved and restored without it.
+    import scipy.sparse   #The exchange matrix is sparse, so stacks of thousands of surfaces stay fast.
+    import scipy.sparse.linalg   #Solves for the radiation bouncing between the surfaces.
+except ImportError:
+    scipy = None
+
+#Every object has surfaces: a left and a right one, and a TwoConnectedBlackbodies also has the two inner surfaces that face each other. Every surface has an emissivity ε
+#(the fraction of σT^4 it emits, and of arriving radiation it absorbs) and a transmissivity τ (the fraction of arriving radiation that passes through the object and leaves
+#from its other surface). What is neither absorbed nor let through is reflected, back the way it came. A view factor F is the fraction of what leaves one surface that arrives
+#at another. Whatever leaves a surface and arrives at no surface is lost to space, and so is whatever is absorbed by a surface without a temperature (voids, and mirrors that are not perfect).
+#The default is the stack of Simulator.py: every surface has ε=1 and τ=0, except mirrors (ε=0, so they reflect everything) and voids (ε=1, lost to space),
+#and every surface sees the surface facing it with F=1. Exchange.set() and Exchange.view() change that, e.g. for plates that let some radiation through,
+#gaps that leak part of it to space, mirrors that absorb some, or surfaces that see surfaces further along the stack.
+#Radiation bounces between the surfaces within a step, like off a mirror in Simulator.py. Where all of it ends up only depends on the surfaces, so we work it out once,
+#as a sparse matrix of how much of what every cell emits every cell absorbs, with a last row for space. A step is then one sparse matrix-vector product.
+
+SIDES = {"M": ("left", "right"), "HS": ("left", "right"), "BB": ("left", "right"), "TSBB": ("left", "right"), "TCBB": ("left", "inner_left", "inner_right", "right"), "V": ("left", "right")} #The surfaces of every type of object, left to right.
+
+class Exchange: #The emissivity and transmissivity of every surface, and the view factors between them. Only what was set by hand is kept, so objects can be added, inserted and removed.
+
+    def __init__(self, simulation): #We need a reference to the simulation object, to find the objects.
+        self.simulation = simulation #A reference to the simulation object.
+        self.properties = {} #(emissivity, transmissivity) of surfaces set by hand, by (object, side).
+        self.views = {} #View factors set by hand, by ((object, side), (object, side)).
+
+    def set(self, object, side=None, emissivity=None, transmissivity=None): #Set the emissivity and/or transmissivity of one surface of an object, or of all of them when side is None.
+        for side in SIDES[object.tag] if side is None else (side,):
+            if side not in SIDES[object.tag]:
+                raise ValueError(f"A {type(object).__name__} has no {side} surface. Its surfaces are {', '.join(SIDES[object.tag])}.")
+            old = self.properties.get((object, side), self.default(object))
+            new = (old[0] if emissivity is None else emissivity, old[1] if transmissivity is None else transmissivity)
+            if min(new) < 0 or sum(new) > 1:
+                raise ValueError(f"Emissivity {new[0]} and transmissivity {new[1]} must be positive, and add up to at most 1.")
+            self.properties[(object, side)] = new
+
+    def view(self, object, side, other, other_side, factor, reciprocal=True): #Set the view factor from a surface of object to a surface of other. Every surface has the same area, so by default the view back is the same.
+        for end in ((object, side), (other, other_side)):
+            if end[1] not in SIDES[end[0].tag]:
+                raise ValueError(f"A {type(end[0]).__name__} has no {end[1]} surface. Its surfaces are {', '.join(SIDES[end[0].tag])}.")
+        self.views[((object, side), (other, other_side))] = factor
+        if reciprocal:
+            self.views[((other, other_side), (object, side))] = factor
+
+    def describe(self): #Everything set by hand, with objects given by their index in the stack, as something json can write. See Cache.py.
+        position = {id(object): index for index, object in enumerate(self.simulation.slots)}
+        properties = sorted([position[id(object)], side, emissivity, transmissivity] for (object, side), (emissivity, transmissivity) in self.properties.items() if id(object) in position)
+        views = sorted([position[id(a[0])], a[1], position[id(b[0])], b[1], factor] for (a, b), factor in self.views.items() if id(a[0]) in position and id(b[0]) in position)
+        return {"properties": properties, "views": views}
+
+    def restore(self, description): #Set everything in a description from describe() again.
+        slots = self.simulation.slots
+        for index, side, emissivity, transmissivity in description["properties"]:
+            self.set(slots[index], side, emissivity, transmissivity)
+        for index, side, other, other_side, factor in description["views"]:
+            self.view(slots[index], side, slots[other], other_side, factor, reciprocal=False)
+
+    def default(self, object): #The (emissivity, transmissivity) of the surfaces of an object that were not set by hand.
+        return (0, 0) if object.tag == "M" else (1, 0) #Perfect mirrors reflect everything. Everything else is black.
+
+    def surfaces(self, cells): #Number every surface. Returns the surfaces as (object, side), and for every surface: the cell it belongs to (-1 for mirrors and voids), the surface on the other side of the object, its emissivity and transmissivity.
+        surfaces, owner, back, emissivity, transmissivity = [], [], [], [], []
+        for object, cell in zip(self.simulation.slots, cells):
+            first = len(surfaces)
+            sides = SIDES[object.tag]
+            for number, side in enumerate(sides):
+                surfaces.append((object, side))
+                if not cell: #Mirrors and voids have no temperature.
+                    owner.append(-1)
+                else:
+                    owner.append(cell[0] if number < len(sides) // 2 else cell[1]) #The left half of the surfaces belongs to the left cell.
+                back.append(first + (number ^ 1)) #The surfaces come in pairs of opposite sides: left and right, or left and inner_left, inner_right and right.
+                properties = self.properties.get((object, side), self.default(object))
+                emissivity.append(properties[0])
+                transmissivity.append(properties[1])
+        return surfaces, np.array(owner, dtype=int), np.array(back, dtype=int), np.array(emissivity, dtype=float), np.array(transmissivity, dtype=float)
+
+    def matrix(self, cells, n): #The exchange matrix of the n cells: how much of the radiation every cell emits per black face ends up in every cell, as [cell, cell], with a last row for space. Also returns how many black faces every cell emits from.
+        if scipy is None:
+            raise ImportError("The view factor engine needs scipy, which is not installed. Install it with pip install scipy, or use another engine.")
+        surfaces, owner, back, emissivity, transmissivity = self.surfaces(cells)
+        m = len(surfaces)
+        index = {surface: number for number, surface in enumerate(surfaces)}
+        views = {} #View factor by (from, to) surface number.
+        for number in range(m - 1): #Every surface sees the one facing it: the right surface of every object sees the left surface of the next one,
+            if surfaces[number][1] == "right" and surfaces[number + 1][1] == "left":
+                views[(number, number + 1)] = views[(number + 1, number)] = 1
+            if surfaces[number][1] == "inner_left": #and the inner surfaces of a TwoConnectedBlackbodies see each other.
+                views[(number, number + 1)] = views[(number + 1, number)] = 1
+        for (a, b), factor in self.views.items(): #Then the view factors set by hand, for objects that are still in the stack.
+            if a in index and b in index:
+                views[(index[a], index[b])] = factor
+        rows, columns = zip(*views) if views else ((), ())
+        seen = scipy.sparse.csr_matrix((list(views.values()), (rows, columns)), shape=(m, m)) #F, as [from, to].
+        if np.any(seen.sum(axis=1) > 1 + 1e-12):
+            raise ValueError("The view factors from a surface add up to more than 1.")
+        bounce = scipy.sparse.csr_matrix((np.concatenate([1 - emissivity - transmissivity, transmissivity]), (np.concatenate([np.arange(m), back]), np.concatenate([np.arange(m), np.arange(m)]))), shape=(m, m)) #What arrives at a surface and leaves again, as [leaves from, arrives at].
+        hot = owner >= 0
+        emitted = scipy.sparse.csr_matrix((emissivity[hot], (np.nonzero(hot)[0], owner[hot])), shape=(m, n)) #What leaves every surface, per black face of every cell, before it bounces.
+        leaving = self.bounces((bounce @ seen.T).tocsr(), emitted) #What leaves every surface, after every bounce. leaving = emitted + bounce F^T leaving.
+        absorbed = scipy.sparse.diags(emissivity) @ seen.T @ leaving #What every surface absorbs.
+        belongs = scipy.sparse.csr_matrix((np.ones(hot.sum()), (owner[hot], np.nonzero(hot)[0])), shape=(n, m)) #Which cell every surface belongs to.
+        received = belongs @ absorbed #What every cell absorbs.
+        faces = np.asarray(belongs @ emissivity).ravel() #How many black faces every cell emits from.
+        lost = faces - np.asarray(received.sum(axis=0)).ravel() #Everything else is lost to space.
+        return scipy.sparse.vstack([received, scipy.sparse.csr_matrix(lost.reshape(1, -1))]).tocsr(), faces
+
+    def bounces(self, bounce, emitted, iterations=1000): #Solve leaving = emitted + bounce @ leaving. Follows the radiation bounce by bounce, which stays sparse and ends after a few bounces when most surfaces are black.
+        leaving = term = emitted
+        for _ in range(iterations):
+            term = (bounce @ term).tocsr()
+            term.data[abs(term.data) < 1e-18] = 0 #Less than 1e-18 of the emission is too little to matter.
+            term.eliminate_zeros()
+            if not term.nnz: #Everything got absorbed or lost to space.
+                return leaving
+            leaving = leaving + term
+        return self.solve(bounce, emitted) #Surfaces that reflect nearly everything keep radiation bouncing for too long. Solve for it instead.
+
+    def solve(self, bounce, emitted): #Solve leaving = emitted + bounce @ leaving with a sparse LU factorisation. Only for the surfaces radiation can reach, since perfect mirrors facing each other would make it singular.
+        reached = np.asarray(abs(emitted).sum(axis=1)).ravel() > 0 #Surfaces that emit, and every surface radiation can bounce to from them.
+        graph = bounce.T.tocsr() #graph[a, b] != 0 when radiation leaving a can leave b next.
+        frontier = np.nonzero(reached)[0]
+        while len(frontier):
+            following = np.unique(graph[frontier].indices)
+            frontier = following[~reached[following]]
+            reached[frontier] = True
+        cut = np.nonzero(reached)[0]
+        if not len(cut):
+            return scipy.sparse.csr_matrix(emitted.shape)
+        system = (scipy.sparse.identity(len(cut)) - bounce[cut][:, cut]).tocsc()
+        try:
+            factors = scipy.sparse.linalg.splu(system)
+        except RuntimeError: #The factorisation is exactly singular.
+            raise ValueError("Radiation is trapped between surfaces that reflect or let through all of it, so it never gets absorbed.") from None
+        right = emitted[cut].tocsc()
+        blocks = []
+        for start in range(0, right.shape[1], 256): #Solve for a block of cells at a time, so we never hold a dense matrix of every surface by every cell.
+            block = factors.solve(right[:, start:start + 256].toarray())
+            if not np.all(np.isfinite(block)):
+                raise ValueError("Radiation is trapped between surfaces that reflect or let through all of it, so it never gets absorbed.")
+            block[abs(block) < 1e-15 * abs(block).max(initial=0)] = 0 #Round-off where no radiation arrives.
+            blocks.append(scipy.sparse.csr_matrix(block))
+        solution = scipy.sparse.hstack(blocks).tocoo() if blocks else scipy.sparse.coo_matrix((len(cut), 0))
+        return scipy.sparse.csr_matrix((solution.data, (cut[solution.row], solution.col)), shape=emitted.shape) #Back to every surface. The others never see any radiation.
+
+class ViewFactorEngine(ArrayEngine): #The array engine, with radiation exchanged through the sparse exchange matrix of simulation.exchange instead of only between neighbours.
+
+    def pack(self): #Read the state of every slot object into arrays, like the array engine, and work out the exchange matrix.
+        super().pack()
+        simulation = self.simulation
+        if simulation.exchange is None: #The stack of Simulator.py, until surfaces or view factors are set by hand.
+            simulation.exchange = Exchange(simulation)
+        self.exchange, self.faces = simulation.exchange.matrix(self.cells, self.space)
+        self.loss = self.faces / self.capacity
+
+    def receive(self, emission): #Add up all the radiation arriving at each cell, in one sparse matrix-vector product. The last entry is what is lost to space.
+        return self.exchange @ emission
@@ -0,0 +1,44 @@
+import pytest
+from Simulator import Simulation, Mirror, Blackbody, HeatSource, TwoConnectedBlackbodies
+
+def run(*objects, steps=2000): #Run a stack on the adaptive engine, and return the simulation.
+    simulation = Simulation(draw=False, logfile=None, maxSteps=steps, engine="adaptive")
+    for make in objects:
+        make(simulation)
+    simulation.main()
+    return simulation
+
+def test_isolated_system_finishes():
+    simulation = run(Mirror, lambda s: Blackbody(s, temperature=500), Blackbody, Mirror)
+    assert simulation.steps == 2000
+    assert simulation.time < float("inf")
+    assert simulation.array_engine.dt <= simulation.array_engine.max_dt
+    assert abs(simulation.energy_drift()) < 1e-6 * simulation.calc_energy()
+
+def test_cold_stack_finishes():
+    simulation = run(Blackbody, Blackbody)
+    assert simulation.steps == 2000
+    assert simulation.time <= simulation.array_engine.max_dt * 2000
+    assert simulation.cell_temperatures() == [0, 0]
+
+def test_negative_heat_source_settles_like_the_fixed_step_engines():
+    stack = (lambda s: HeatSource(s, watts=-5), TwoConnectedBlackbodies, lambda s: HeatSource(s, watts=3))
+    adaptive = run(*stack, steps=5000)
+    fused = Simulation(draw=False, logfile=None, maxSteps=int(adaptive.time * 1000), engine="fused")
+    for make in stack:
+        make(fused)
+    fused.main()
+    assert adaptive.cell_temperatures()[0] > 20 #Not held at 0K by the clamp.
+    assert adaptive.cell_temperatures() == pytest.approx(fused.cell_temperatures(), rel=1e-4)
+    assert abs(adaptive.energy_drift()) < 1e-6 * adaptive.JoulesInput
+
+def test_clamping_goes_in_the_energy_ledger():
+    simulation = Simulation(draw=False, logfile=None, maxSteps=1, engine="adaptive", tolerance=1e6)
+    Blackbody(simulation, temperature=300, mass=1e-3)
+    Blackbody(simulation)
+    simulation.main()
+    simulation.array_engine.dt = 1e-2 #Far too long for such a light blackbody, so it overshoots below 0K.
+    simulation.maxSteps, simulation.running = 1, True
+    simulation.main()
+    assert simulation.JoulesClamped > 0
+    assert abs(simulation.energy_drift() - simulation.JoulesClamped) < 1e-12
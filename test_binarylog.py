@@ -0,0 +1,39 @@
+import numpy as np
+import BinaryLog
+from Simulator import Simulation, Mirror, HeatSource, Blackbody, TwoSidedBlackbody, TwoConnectedBlackbodies, Void
+
+def stack(simulation): #Every type of object, so every kind of column shows up.
+    Void(simulation)
+    HeatSource(simulation)
+    TwoSidedBlackbody(simulation)
+    TwoConnectedBlackbodies(simulation)
+    Blackbody(simulation)
+    Mirror(simulation)
+
+def test_records_read_back_as_written(tmp_path):
+    path = str(tmp_path / "log.bin")
+    tags = ["HS", "TSBB", "M"]
+    log = BinaryLog.BinaryLog(path, tags, stepsPerSecond=100, every=5, buffer_size=3) #A tiny buffer, so the writer thread gets many of them.
+    rows = [[step, step / 2, step / 3, step / 7, step * 1e-300, step * 1e300] for step in range(0, 500, 5)]
+    for row in rows:
+        log.write(row[0], row[1:4], row[4], row[5])
+    log.close()
+    header, data = BinaryLog.read(path)
+    assert header["slots"] == tags
+    assert header["columns"] == ["step", "HS0", "TSBB1_left", "TSBB1_right", "lost", "energy"]
+    assert (header["stepsPerSecond"], header["every"]) == (100, 5)
+    assert np.array_equal(data, np.array(rows))
+    assert np.array_equal(BinaryLog.read(path, mmap=False)[1], data)
+
+def test_export_matches_the_text_log(tmp_path):
+    textfile, binaryfile = str(tmp_path / "log.dat"), str(tmp_path / "log.bin")
+    text = Simulation(draw=False, logfile=textfile, maxSteps=50, logevery=5)
+    stack(text)
+    text.main()
+    binary = Simulation(draw=False, logfile=binaryfile, logformat="binary", maxSteps=50, logevery=5)
+    stack(binary)
+    binary.main()
+    exported = str(tmp_path / "exported.dat")
+    BinaryLog.export_text(binaryfile, exported)
+    with open(textfile) as f, open(exported) as g:
+        assert f.read() == g.read()
@@ -0,0 +1,24 @@
+import pytest
+import Cache
+from Simulator import Simulation, HeatSource, Blackbody, TwoSidedBlackbody
+
+def scenario(engine): #A scenario that clamps, so every part of the energy ledger is in use.
+    simulation = Simulation(draw=False, logfile=None, maxSteps=500, engine=engine)
+    HeatSource(simulation)
+    Blackbody(simulation, temperature=300, mass=1e-3) #Far too light for the step length, so it clamps.
+    TwoSidedBlackbody(simulation)
+    return simulation
+
+@pytest.mark.parametrize("engine", ["object", "array"])
+def test_a_cache_hit_restores_the_whole_ledger(tmp_path, engine):
+    cache = Cache.ResultCache(str(tmp_path))
+    ran = scenario(engine)
+    Cache.run(ran, cache)
+    restored = scenario(engine)
+    Cache.run(restored, cache)
+    assert cache.hits == 1
+    for name in ("JoulesLostToSpace", "JoulesInput", "JoulesClamped", "initial_energy", "steps", "time"):
+        assert getattr(restored, name) == getattr(ran, name)
+    assert restored.cell_temperatures() == ran.cell_temperatures()
+    assert restored.energy_drift() == pytest.approx(ran.energy_drift(), abs=1e-12)
+    assert ran.energy_drift() > 0 #The clamp shows, in JoulesClamped or in what the audit finds.
@@ -0,0 +1,41 @@
+import pytest
+import Checkpoint
+from Simulator import Simulation, Mirror, HeatSource, Blackbody, TwoSidedBlackbody
+
+def stack(simulation): #A decaying heat source, so the checkpoint has to keep the watts after decay too.
+    HeatSource(simulation, decay=0.9999)
+    TwoSidedBlackbody(simulation)
+    Blackbody(simulation)
+    Mirror(simulation)
+
+@pytest.mark.parametrize("engine", ["object", "array", "adaptive", "fused"])
+def test_resuming_from_a_checkpoint_matches_an_unbroken_run(tmp_path, engine):
+    path = str(tmp_path / "checkpoint.json")
+    unbroken = Simulation(draw=False, logfile=None, maxSteps=1000, engine=engine)
+    stack(unbroken)
+    unbroken.main()
+    first = Simulation(draw=False, logfile=None, maxSteps=400, engine=engine, checkpoint=path)
+    stack(first)
+    first.main()
+    first.maxSteps += 600 #The steps the unbroken run still has to go.
+    first.save_checkpoint()
+    resumed = Checkpoint.load(path)
+    resumed.main()
+    assert resumed.steps == unbroken.steps
+    assert resumed.cell_temperatures() == unbroken.cell_temperatures()
+    for name in ("JoulesLostToSpace", "JoulesInput", "time"):
+        assert getattr(resumed, name) == getattr(unbroken, name)
+
+def test_warm_start_copies_only_the_temperatures():
+    settled = Simulation(draw=False, logfile=None, maxSteps=1000)
+    stack(settled)
+    settled.main()
+    changed = Simulation(draw=False, logfile=None, maxSteps=1000)
+    HeatSource(changed, watts=500)
+    TwoSidedBlackbody(changed)
+    Blackbody(changed)
+    Mirror(changed)
+    Checkpoint.warm_start(changed, settled)
+    assert changed.cell_temperatures() == settled.cell_temperatures()
+    assert changed.slots[0].watts == 500
+    assert abs(changed.energy_drift()) < 1e-12
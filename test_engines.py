@@ -0,0 +1,40 @@
+import pytest
+from Simulator import Simulation, Mirror, HeatSource, Blackbody, TwoSidedBlackbody, TwoConnectedBlackbodies, Void
+
+STACKS = { #Stacks that use every kind of object, so every engine has to get mirrors, conduction, voids and connected blackbodies right.
+    "mirror": lambda simulation: [HeatSource(simulation), Blackbody(simulation), Mirror(simulation)],
+    "tsbb": lambda simulation: [HeatSource(simulation), TwoSidedBlackbody(simulation), Blackbody(simulation)],
+    "void": lambda simulation: [Void(simulation), HeatSource(simulation, decay=0.999), Blackbody(simulation), Void(simulation)],
+    "tcbb": lambda simulation: [HeatSource(simulation), TwoConnectedBlackbodies(simulation), Mirror(simulation)],
+}
+
+def run(engine, stack, steps=2000, **options): #Run a stack on an engine, and return the simulation.
+    simulation = Simulation(draw=False, logfile=None, maxSteps=steps, engine=engine, **options)
+    STACKS[stack](simulation)
+    simulation.main()
+    return simulation
+
+def close(simulation, reference, tolerance=1e-13): #Do two simulations have the same temperatures and energy ledger?
+    scale = max(max(reference.cell_temperatures()), 1)
+    assert all(abs(a - b) <= tolerance * scale for a, b in zip(simulation.cell_temperatures(), reference.cell_temperatures()))
+    assert abs(simulation.JoulesLostToSpace - reference.JoulesLostToSpace) <= tolerance * max(reference.JoulesInput, 1)
+    assert simulation.steps == reference.steps
+
+@pytest.mark.parametrize("stack", sorted(STACKS))
+def test_array_engine_matches_the_object_engine(stack):
+    close(run("array", stack), run("object", stack))
+
+@pytest.mark.parametrize("stack", sorted(STACKS))
+def test_fused_engine_matches_the_object_engine(stack):
+    close(run("fused", stack), run("object", stack))
+
+@pytest.mark.parametrize("options", [dict(stop_rate=1e-2), dict(stop_imbalance=1.0), dict(stop_rate=1e-2, stop_imbalance=1e-3)])
+def test_fused_engine_stops_at_the_same_step(options):
+    fused = run("fused", "mirror", steps=1e5, **options)
+    close(fused, run("object", "mirror", steps=1e5, **options), tolerance=1e-9)
+    assert fused.steps < 1e5
+
+@pytest.mark.parametrize("stack", sorted(STACKS))
+def test_view_factor_engine_matches_the_object_engine(stack):
+    pytest.importorskip("scipy") #The view factor engine needs scipy.
+    close(run("viewfactor", stack), run("object", stack))
@@ -0,0 +1,31 @@
+import numpy as np
+import BinaryLog
+from Ensemble import EnsembleSimulation
+from Simulator import Simulation, Mirror, HeatSource, Blackbody, TwoSidedBlackbody
+
+WATTS = [100, 250, 400]
+MASS = [0.5, 1, 2]
+
+def stack(simulation, watts, mass): #The same stack for the ensemble and for every member on its own.
+    HeatSource(simulation, watts=watts, decay=0.9999)
+    TwoSidedBlackbody(simulation)
+    Blackbody(simulation, mass=mass)
+    Mirror(simulation)
+
+def test_every_member_matches_its_own_simulation(tmp_path):
+    ensemble = EnsembleSimulation(len(WATTS), logfile=str(tmp_path / "log.bin"), maxSteps=500, logevery=100)
+    stack(ensemble, np.array(WATTS), np.array(MASS))
+    ensemble.main()
+    summary = ensemble.summary()
+    header, records = BinaryLog.read(str(tmp_path / "log.bin"))
+    for member, (watts, mass) in enumerate(zip(WATTS, MASS)):
+        alone = Simulation(draw=False, logfile=None, maxSteps=500, engine="array")
+        stack(alone, watts, mass)
+        alone.main()
+        assert np.allclose(summary["temperatures"][member], alone.cell_temperatures(), rtol=1e-13, atol=0)
+        assert np.isclose(summary["JoulesLostToSpace"][member], alone.JoulesLostToSpace, rtol=1e-13, atol=0)
+        last = records[(records[:, 0] == 500) & (records[:, 1] == member)] #The record of this member at the last step.
+        assert np.allclose(last[0, 2:-2], alone.cell_temperatures(), rtol=1e-13, atol=0)
+    assert header["members"] == len(WATTS)
+    assert len(records) == 6 * len(WATTS)
+    assert np.all(abs(ensemble.energy_drift()) < 1e-9)
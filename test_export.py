@@ -0,0 +1,33 @@
+import os
+import pytest
+import Export
+from Simulator import Simulation, Mirror, HeatSource, Blackbody, TwoSidedBlackbody
+
+def simulation(steps, engine="object"): #A small headless run to render.
+    simulation = Simulation(draw=False, logfile=None, maxSteps=steps, engine=engine)
+    HeatSource(simulation)
+    TwoSidedBlackbody(simulation)
+    Blackbody(simulation)
+    Mirror(simulation)
+    return simulation
+
+def test_schedule_spreads_the_frames_over_the_run():
+    assert Export.schedule(1000, 5) == [0, 250, 500, 750, 1000]
+    assert Export.schedule(1000, 1) == [1000]
+    assert len(Export.schedule(3, 10)) == 10
+
+@pytest.mark.parametrize("engine", ["object", "fused"])
+def test_every_nth_step_is_written_as_png_frames(tmp_path, engine):
+    pygame = pytest.importorskip("pygame")
+    path = str(tmp_path / "frames")
+    assert Export.run(simulation(500, engine), path, every=100, size=(300, 80)) == 6 #The starting state and every 100th step.
+    names = sorted(os.listdir(path))
+    assert names == [f"frame-{index:06d}.png" for index in range(6)]
+    image = pygame.image.load(os.path.join(path, names[-1]))
+    assert image.get_size() == (300, 80)
+
+def test_exactly_the_number_of_frames_asked_for(tmp_path):
+    pytest.importorskip("pygame")
+    path = str(tmp_path / "frames")
+    assert Export.run(simulation(1000), path, frames=7, size=(300, 80)) == 7
+    assert len(os.listdir(path)) == 7
@@ -0,0 +1,37 @@
+import warnings
+import pytest
+from Simulator import Simulation, HeatSource, Blackbody, TwoSidedBlackbody
+
+def simulation(watts=400, steps=200): #A stiff stack: light, well conducting plates, at one step per second.
+    simulation = Simulation(draw=False, logfile=None, maxSteps=steps, engine="implicit")
+    simulation.stepsPerSecond = 1
+    HeatSource(simulation, watts=watts, temperature=10)
+    TwoSidedBlackbody(simulation, mass_left=1e-3, mass_right=1e-3, conductivity=500)
+    Blackbody(simulation)
+    return simulation
+
+def test_clamping_goes_in_the_energy_ledger():
+    cooled = simulation(watts=-5)
+    cooled.main()
+    assert cooled.JoulesClamped > 0
+    assert abs(cooled.unaccounted) < 1e-9
+    assert cooled.energy_drift() == pytest.approx(cooled.JoulesClamped)
+
+def test_steps_that_do_not_converge_are_halved():
+    reference = simulation()
+    reference.main()
+    halved = simulation()
+    halved.update()
+    halved.array_engine.iterations = 2 #Too few for the first steps from cold, so they have to be cut up.
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        halved.main()
+    assert halved.cell_temperatures() == pytest.approx(reference.cell_temperatures(), rel=1e-4)
+
+def test_steps_that_never_converge_warn():
+    stuck = simulation(steps=1)
+    stuck.update()
+    stuck.array_engine.iterations, stuck.array_engine.halvings = 1, 0
+    stuck.running = True
+    with pytest.warns(RuntimeWarning, match="did not converge"):
+        stuck.update()
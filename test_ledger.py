@@ -0,0 +1,36 @@
+import pytest
+
+from Simulator import Simulation, Mirror, HeatSource, Blackbody, TwoSidedBlackbody, TwoConnectedBlackbodies, Void
+
+def mixed(simulation): #Every type of object.
+    HeatSource(simulation)
+    Blackbody(simulation)
+    TwoConnectedBlackbodies(simulation)
+    Void(simulation)
+    TwoSidedBlackbody(simulation)
+    Mirror(simulation)
+
+def test_ledger_matches_the_objects():
+    simulation = Simulation(draw=False, logfile=None, maxSteps=2000)
+    mixed(simulation)
+    simulation.main()
+    assert abs(simulation.calc_energy() - simulation.count_energy()) < 1e-9
+    assert abs(simulation.energy_drift()) < 1e-9
+    assert max(abs(leak) for leak in simulation.leaks()) < 1e-9
+
+def test_audit_finds_objects_changed_by_hand():
+    simulation = Simulation(draw=False, logfile=None, maxSteps=100)
+    mixed(simulation)
+    simulation.main()
+    simulation.slots[1].temperature += 1
+    assert abs(simulation.energy_drift() - 1) < 1e-9
+    assert abs(simulation.leaks()[1] - 1) < 1e-9
+
+def test_clamping_sets_off_the_drift_alarm():
+    simulation = Simulation(draw=False, logfile=None, maxSteps=20, drift_tolerance=1e-9)
+    simulation.stepsPerSecond = 1 #Far too few steps, so the blackbody cools below 0K in one step.
+    Blackbody(simulation, temperature=600, mass=0.01)
+    with pytest.warns(RuntimeWarning):
+        simulation.main()
+    assert simulation.drift_alarm is not None
+    assert simulation.energy_drift() == simulation.JoulesClamped > 0
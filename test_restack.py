@@ -0,0 +1,41 @@
+import BinaryLog
+from Simulator import Simulation, Mirror, HeatSource, Blackbody, TwoSidedBlackbody
+
+def stack(simulation): #A stack with a mirror, so inserting and removing changes where radiation goes.
+    HeatSource(simulation)
+    Blackbody(simulation)
+    Mirror(simulation)
+
+def test_insert_and_remove_mid_run_match_a_fresh_run():
+    simulation = Simulation(draw=False, logfile=None, maxSteps=300)
+    stack(simulation)
+    for snapshot in simulation.iter_steps(100):
+        if snapshot.steps == 100:
+            simulation.insert(1, TwoSidedBlackbody(simulation))
+        if snapshot.steps == 200:
+            simulation.remove(simulation.slots[1])
+    reference = Simulation(draw=False, logfile=None, maxSteps=100)
+    stack(reference)
+    reference.main()
+    reference.insert(1, TwoSidedBlackbody(reference))
+    reference.maxSteps, reference.running = 100, True
+    reference.main()
+    reference.remove(reference.slots[1])
+    reference.maxSteps, reference.running = 100, True
+    reference.main()
+    assert simulation.cell_temperatures() == reference.cell_temperatures()
+    assert abs(simulation.energy_drift()) < 1e-9
+
+def test_binary_log_moves_to_a_new_file_when_objects_are_added(tmp_path):
+    logfile = str(tmp_path / "log.bin")
+    simulation = Simulation(draw=False, logfile=logfile, logformat="binary", maxSteps=20)
+    stack(simulation)
+    for snapshot in simulation.iter_steps(10):
+        if snapshot.steps == 10:
+            simulation.insert(3, Blackbody(simulation))
+    first, records = BinaryLog.read(logfile)
+    second, more = BinaryLog.read(str(tmp_path / "log.1.bin"))
+    assert first["slots"] == ["HS", "BB", "M"]
+    assert second["slots"] == ["HS", "BB", "M", "BB"]
+    assert list(records[:, 0]) == list(range(11))
+    assert list(more[:, 0]) == list(range(10, 21))
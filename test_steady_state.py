@@ -0,0 +1,12 @@
+from Simulator import Simulation, Mirror, HeatSource, Blackbody
+
+def test_solving_keeps_the_watts_of_decaying_heat_sources():
+    simulation = Simulation(draw=False, logfile=None, engine="array")
+    source = HeatSource(simulation, watts=400, decay=0.999)
+    Blackbody(simulation)
+    Mirror(simulation)
+    simulation.update()
+    simulation.solve_steady_state()
+    assert source.watts == 400 * 0.999
+    assert source.decay == 0.999
+    assert simulation.array_engine.watts[0] == 400 * 0.999 #The array engine carries on from them too.
@@ -0,0 +1,38 @@
+import numpy as np
+import BinaryLog
+from TextLog import TextLog
+from Simulator import Simulation, Mirror, HeatSource, Blackbody, TwoSidedBlackbody, TwoConnectedBlackbodies, Void
+
+def logs(tmp_path, every=5): #A text log and a binary log of the same run, with every type of object.
+    files = []
+    for logformat, name in (("text", "log.dat"), ("binary", "log.bin")):
+        simulation = Simulation(draw=False, logfile=str(tmp_path / name), logformat=logformat, maxSteps=200, logevery=every)
+        Void(simulation)
+        HeatSource(simulation)
+        TwoSidedBlackbody(simulation)
+        TwoConnectedBlackbodies(simulation)
+        Blackbody(simulation)
+        Mirror(simulation)
+        simulation.main()
+        files.append(str(tmp_path / name))
+    return files
+
+def test_convert_matches_the_binary_log_of_the_run(tmp_path):
+    textfile, binaryfile = logs(tmp_path)
+    converted = TextLog(textfile, every=5).convert(str(tmp_path / "converted.bin"))
+    header, data = BinaryLog.read(converted)
+    expected_header, expected = BinaryLog.read(binaryfile)
+    assert header["columns"] == expected_header["columns"]
+    assert (header["slots"], header["every"]) == (expected_header["slots"], 5)
+    assert np.allclose(data, expected, rtol=0, atol=5e-7) #The text log only has 6 decimals.
+
+def test_convert_keeps_every_decimate_th_line(tmp_path):
+    textfile, binaryfile = logs(tmp_path)
+    header, data = BinaryLog.read(TextLog(textfile, every=5).convert(str(tmp_path / "converted.bin"), decimate=3))
+    assert header["every"] == 15
+    assert list(data[:, 0]) == list(range(0, 201, 15))
+
+def test_chunks_add_up_to_the_whole_log(tmp_path):
+    textfile, _ = logs(tmp_path)
+    log = TextLog(textfile, every=5)
+    assert np.array_equal(np.concatenate(list(log.chunks(chunk_bytes=100))), log.read())